@@ -0,0 +1,193 @@
+# benchmarks/anonymize.py
+# Benchmark du moteur d'anonymisation sur un jeu de données Dolibarr synthétique (10k à 10M lignes
+# par table), sur SQLite (partie Python, moteur 'update') ou sur un MySQL/MariaDB local.
+# Chaque échelle est mesurée dans un nouvel interpréteur : débit, pic mémoire et durée totale.
+# Les résultats sont ajoutés à un fichier JSON pour comparer les commits entre eux.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def peak_memory_mb():
+    """Pic de mémoire résidente du processus, en Mo (None si indisponible)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : Kio, macOS : octets
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def open_backend(args):
+    """Retourne (connexion, configuration de connexion des workers ou None)."""
+    if args.backend == 'sqlite':
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import sqlite_adapter
+        return sqlite_adapter.connect(args.sqlite_path), None
+    import mysql.connector
+    connection_config = {
+        'host': args.mysql_host,
+        'port': args.mysql_port,
+        'user': args.mysql_user,
+        'password': args.mysql_password,
+        'database': args.mysql_database,
+        'allow_local_infile': True,
+    }
+    return mysql.connector.connect(**connection_config), connection_config
+
+def run_scale(args, rows):
+    """Génère le jeu de données à l'échelle `rows` lignes par table puis l'anonymise ; retourne les mesures."""
+    sys.path.insert(0, ROOT)
+    from benchmarks.dataset import synthetic_tables, create_schema, populate
+    from progiclone import main as progiclone
+
+    tables = synthetic_tables(args.tables)
+    cnx, connection_config = open_backend(args)
+    start = time.perf_counter()
+    create_schema(cnx, tables, args.backend)
+    populate(cnx, tables, rows, seed=args.seed)
+    dataset_seconds = time.perf_counter() - start
+    memory_before = peak_memory_mb()
+
+    options = {
+        'batch_size': args.batch_size,
+        'engine': args.engine,
+        'shards': args.shards,
+        'pool_size': args.pool_size,
+        'seed': args.seed,
+        'sql_pushdown': args.sql_pushdown,
+        'metrics': progiclone.RunMetrics(),
+    }
+    progiclone.fake.seed_instance(args.seed)
+    selected = [(t, f) for t, f in progiclone.tables_to_anonymize if t in {name for name, _, _ in tables}]
+    start = time.perf_counter()
+    selected = progiclone.apply_table_schemas(cnx, progiclone.apply_pool_options(selected, options), options)
+    for table_name, fields_dict in selected:
+        progiclone.anonymize_table(cnx, table_name, fields_dict, progiclone.primary_keys,
+                                   progiclone.table_labels, options, connection_config=connection_config)
+    wall_seconds = time.perf_counter() - start
+    cnx.close()
+
+    table_results = {name: metrics.to_dict() for name, metrics in options['metrics'].tables.items()}
+    total_rows = sum(result['rows'] for result in table_results.values())
+    return {
+        'rows_per_table': rows,
+        'total_rows': total_rows,
+        'wall_seconds': round(wall_seconds, 3),
+        'rows_per_second': round(total_rows / wall_seconds, 1) if wall_seconds else None,
+        'dataset_seconds': round(dataset_seconds, 3),
+        'peak_memory_mb': peak_memory_mb(),
+        'memory_before_run_mb': memory_before,
+        'tables': table_results,
+    }
+
+def child_command(args, rows):
+    command = [sys.executable, os.path.abspath(__file__), '--child', '--rows', str(rows),
+               '--backend', args.backend, '--engine', args.engine, '--batch-size', str(args.batch_size),
+               '--shards', str(args.shards), '--pool-size', str(args.pool_size), '--seed', str(args.seed),
+               '--sqlite-path', args.sqlite_path]
+    if args.sql_pushdown:
+        command.append('--sql-pushdown')
+    if args.backend == 'mysql':
+        command += ['--mysql-host', args.mysql_host, '--mysql-port', str(args.mysql_port),
+                    '--mysql-user', args.mysql_user, '--mysql-database', args.mysql_database]
+    if args.tables:
+        command += ['--tables'] + args.tables
+    return command
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du moteur d'anonymisation de progiclone")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000],
+                        help='Nombre de lignes par table, une mesure par valeur (défaut: 10000)')
+    parser.add_argument('--tables', nargs='+', help='Tables mesurées (toutes les tables prises en charge par défaut)')
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite',
+                        help="Base de mesure : SQLite (partie Python, moteur 'update') ou MySQL/MariaDB local")
+    parser.add_argument('--engine', choices=['update', 'infile', 'shadow'], default='update')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--shards', type=int, default=1, help='Plages en parallèle par table (MySQL uniquement)')
+    parser.add_argument('--pool-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sql-pushdown', action='store_true',
+                        help='Colonnes exprimables en SQL calculées côté serveur (un UPDATE par table)')
+    parser.add_argument('--sqlite-path', help='Fichier SQLite de travail (temporaire par défaut)')
+    parser.add_argument('--mysql-host', default='127.0.0.1')
+    parser.add_argument('--mysql-port', type=int, default=3306)
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default=os.environ.get('PROGICLONE_BENCH_PASSWORD', ''),
+                        help='Mot de passe MySQL (ou PROGICLONE_BENCH_PASSWORD)')
+    parser.add_argument('--mysql-database', default='progiclone_bench',
+                        help='Base de travail, entièrement réécrite (défaut: progiclone_bench)')
+    parser.add_argument('--output', help='Fichier JSON auquel ajouter les résultats (liste de runs)')
+    parser.add_argument('--verbose', action='store_true', help='Afficher la sortie de progiclone')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend == 'sqlite' and (args.engine != 'update' or args.shards > 1):
+        parser.error("le backend SQLite ne couvre que le moteur 'update' sans --shards")
+
+    if args.child:
+        result = run_scale(args, args.rows[0])
+        print('RESULT:' + json.dumps(result))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        args.sqlite_path = args.sqlite_path or os.path.join(workdir, 'bench.sqlite')
+        for rows in sorted(args.rows):
+            env = dict(os.environ, PROGICLONE_NO_UPDATE_CHECK='1', PROGICLONE_BENCH_PASSWORD=args.mysql_password)
+            completed = subprocess.run(child_command(args, rows), env=env, stdout=subprocess.PIPE,
+                                       stderr=None if args.verbose else subprocess.DEVNULL, text=True)
+            result = None
+            for line in completed.stdout.splitlines():
+                if line.startswith('RESULT:'):
+                    result = json.loads(line[len('RESULT:'):])
+                elif args.verbose:
+                    print(line)
+            if result is None:
+                print(f"{rows:>10} lignes/table : échec (code {completed.returncode}, relancez avec --verbose)")
+                sys.exit(1)
+            results.append(result)
+            print(f"{rows:>10} lignes/table : {result['total_rows']:>10} lignes en {result['wall_seconds']:8.2f} s, "
+                  f"{result['rows_per_second']:>10.0f} lignes/s, pic mémoire {result['peak_memory_mb']} Mo")
+
+    run = {
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'engine': args.engine,
+        'batch_size': args.batch_size,
+        'shards': args.shards,
+        'pool_size': args.pool_size,
+        'seed': args.seed,
+        'sql_pushdown': args.sql_pushdown,
+        'results': results,
+    }
+    if args.output:
+        runs = []
+        if os.path.exists(args.output):
+            with open(args.output) as f:
+                runs = json.load(f)
+        runs.append(run)
+        with open(args.output, 'w') as f:
+            json.dump(runs, f, indent=2)
+        print(f"Résultats ajoutés à {args.output}")
+    else:
+        print(json.dumps(run, indent=2))
+
+if __name__ == '__main__':
+    main()
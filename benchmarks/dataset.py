@@ -0,0 +1,56 @@
+# benchmarks/dataset.py
+# Schéma Dolibarr synthétique : une table par entrée de tables_to_anonymize (clé primaire,
+# colonnes anonymisées, quelques colonnes non anonymisées), remplie de N lignes reproductibles.
+import random
+
+# Colonnes non anonymisées ajoutées à chaque table, pour des lignes de largeur réaliste
+EXTRA_COLUMNS = [('entity', 'INTEGER'), ('fk_user_author', 'INTEGER'), ('datec', 'DATETIME')]
+
+def synthetic_tables(table_names=None):
+    """Retourne [(table, clé primaire, [(colonne, type)])] pour les tables prises en charge."""
+    from progiclone.main import tables_to_anonymize, primary_keys
+    tables = []
+    for table_name, fields_dict in tables_to_anonymize:
+        if table_names and table_name not in table_names:
+            continue
+        pk_field = primary_keys.get(table_name, "rowid")
+        columns = [(field, 'VARCHAR(255)') for field in fields_dict if field != pk_field]
+        columns += [(name, sql_type) for name, sql_type in EXTRA_COLUMNS if name not in fields_dict]
+        tables.append((table_name, pk_field, columns))
+    return tables
+
+def create_schema(cnx, tables, backend):
+    """Recrée les tables synthétiques (et llx_const, lue pour la version du schéma)."""
+    cursor = cnx.cursor()
+    suffix = " ENGINE=InnoDB DEFAULT CHARSET=utf8mb4" if backend == 'mysql' else ""
+    for table_name, pk_field, columns in tables:
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        definitions = ", ".join(f"{name} {sql_type}" for name, sql_type in columns)
+        cursor.execute(f"CREATE TABLE {table_name} ({pk_field} INTEGER PRIMARY KEY, {definitions}){suffix}")
+    cursor.execute("DROP TABLE IF EXISTS llx_const")
+    cursor.execute(f"CREATE TABLE llx_const (name VARCHAR(180), value TEXT){suffix}")
+    cursor.execute("INSERT INTO llx_const (name, value) VALUES (%s, %s)", ('MAIN_VERSION_LAST_INSTALL', 'benchmark'))
+    cnx.commit()
+
+def populate(cnx, tables, rows, seed=42, batch_size=5000):
+    """Remplit chaque table de `rows` lignes d'origine reproductibles, par lots de `batch_size`."""
+    rng = random.Random(seed)
+    cursor = cnx.cursor()
+    for table_name, pk_field, columns in tables:
+        names = [pk_field] + [name for name, _ in columns]
+        query = (f"INSERT INTO {table_name} ({', '.join(names)}) "
+                 f"VALUES ({', '.join(['%s'] * len(names))})")
+        for start in range(1, rows + 1, batch_size):
+            batch = []
+            for rid in range(start, min(start + batch_size, rows + 1)):
+                row = [rid]
+                for name, sql_type in columns:
+                    if sql_type == 'INTEGER':
+                        row.append(rng.randint(1, 1000))
+                    elif sql_type == 'DATETIME':
+                        row.append(f"20{rng.randint(10, 25)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} 12:00:00")
+                    else:
+                        row.append(f"orig-{name}-{rid}")
+                batch.append(row)
+            cursor.executemany(query, batch)
+            cnx.commit()
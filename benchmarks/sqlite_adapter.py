@@ -0,0 +1,141 @@
+# benchmarks/sqlite_adapter.py
+# Connexion SQLite présentant l'interface de mysql.connector utilisée par le moteur 'update' :
+# de quoi mesurer la partie Python (génération, construction des lots, pagination) sans serveur
+# MySQL. Les moteurs 'infile' et 'shadow' et le parallélisme nécessitent un vrai MySQL/MariaDB.
+import hashlib
+import math
+import random
+import re
+import sqlite3
+
+BATCH_UPDATE_RE = re.compile(r"^UPDATE (\w+) AS t JOIN \((.*)\) AS v ON t\.(\w+)=v\.(\w+) SET (.*)$", re.S)
+TYPE_RE = re.compile(r"^(\w+)(?:\((\d+)\))?")
+# INSERT() est un mot réservé de SQLite : la fonction chaîne de MySQL est enregistrée sous un autre nom
+INSERT_FUNCTION_RE = re.compile(r"\bINSERT\(")
+
+def translate(query):
+    """Traduit une requête MySQL du moteur 'update' en SQL SQLite (UPDATE ... FROM, paramètres ?)."""
+    query = INSERT_FUNCTION_RE.sub("MYSQL_INSERT(", query)
+    match = BATCH_UPDATE_RE.match(query)
+    if match:
+        table_name, derived, pk_field, _, set_clause = match.groups()
+        # SQLite n'accepte pas de colonnes qualifiées à gauche du SET
+        set_clause = re.sub(r"\bt\.(\w+)=", r"\1=", set_clause)
+        query = (f"UPDATE {table_name} AS t SET {set_clause} FROM ({derived}) AS v "
+                 f"WHERE t.{pk_field}=v.{pk_field}")
+    return query.replace("%s", "?")
+
+class SQLiteCursor:
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.db.cursor()
+        self._rows = None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, params=None):
+        self._rows = None
+        if "information_schema.COLUMNS" in query:
+            self._rows = self._columns(params or [])
+            return
+        if "information_schema.TABLES" in query:
+            self._rows = self._tables()
+            return
+        if "information_schema.STATISTICS" in query:
+            self._rows = self._unique_columns(params[0])
+            return
+        self._cursor.execute(translate(query), tuple(params or ()))
+
+    def executemany(self, query, seq_params):
+        self._rows = None
+        self._cursor.executemany(translate(query), [tuple(p) for p in seq_params])
+
+    def _tables(self):
+        names = [row[0] for row in self._connection.db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")]
+        return [(name, self._connection.db.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0])
+                for name in names]
+
+    def _unique_columns(self, table_name):
+        """Émule la lecture des colonnes d'index uniques dans information_schema.STATISTICS."""
+        db = self._connection.db
+        columns = {column for _, column, _, _, _, pk in db.execute(f"PRAGMA table_info({table_name})") if pk}
+        for _, index_name, unique, *_ in db.execute(f"PRAGMA index_list({table_name})"):
+            if unique:
+                columns.update(row[2] for row in db.execute(f"PRAGMA index_info({index_name})"))
+        return [(column,) for column in columns]
+
+    def _columns(self, table_names):
+        """Émule information_schema.COLUMNS (TABLE_NAME, COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH)."""
+        rows = []
+        for table_name in table_names:
+            for _, column, declared, *_ in self._connection.db.execute(f"PRAGMA table_info({table_name})"):
+                match = TYPE_RE.match(declared or "")
+                data_type = match.group(1).lower() if match else ""
+                rows.append((table_name, column, data_type, int(match.group(2)) if match and match.group(2) else None))
+        return rows
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        if self._rows is not None:
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return rows
+        return self._cursor.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+# Fonctions MySQL utilisées par --sql-pushdown, absentes de SQLite
+MYSQL_FUNCTIONS = [
+    ('CONCAT', -1, lambda *parts: None if None in parts else "".join(str(p) for p in parts)),
+    ('MD5', 1, lambda value: hashlib.md5(str(value).encode()).hexdigest()),
+    ('RAND', 0, random.random),
+    ('MYSQL_INSERT', 4, lambda text, pos, length, new: text[:pos - 1] + new + text[pos - 1 + length:]),
+    ('FLOOR', 1, lambda value: int(math.floor(value))),
+    ('LPAD', 3, lambda value, length, pad: str(value).rjust(length, pad)[:length]),
+    ('ELT', -1, lambda index, *values: values[int(index) - 1] if 1 <= int(index) <= len(values) else None),
+]
+
+class SQLiteConnection:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        for name, arity, function in MYSQL_FUNCTIONS:
+            self.db.create_function(name, arity, function, deterministic=name in ('CONCAT', 'MD5', 'FLOOR',
+                                                                                  'LPAD', 'ELT', 'MYSQL_INSERT'))
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self._open = True
+
+    def cursor(self, *args, **kwargs):
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        self.db.close()
+        self._open = False
+
+def connect(path):
+    return SQLiteConnection(path)
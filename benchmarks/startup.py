@@ -0,0 +1,75 @@
+# benchmarks/startup.py
+# Mesure le temps de démarrage de la CLI (--version, --help) et vérifie qu'aucune dépendance
+# lourde n'est importée sur ce chemin. Code de retour non nul en cas de régression.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules qui ne doivent être importés qu'au moment où ils servent
+HEAVY_MODULES = ['faker', 'requests', 'mysql.connector', 'yaml', 'tqdm', 'pyfiglet']
+
+PROBE = """
+import sys
+sys.argv = ['progiclone'] + sys.argv[1:]
+from progiclone.main import main
+try:
+    main()
+except SystemExit:
+    pass
+heavy = [m for m in {heavy!r} if m in sys.modules]
+sys.stderr.write('HEAVY:' + ','.join(heavy) + '\\n')
+"""
+
+def run_once(cli_args):
+    """Lance la CLI dans un nouvel interpréteur ; retourne (durée en secondes, modules lourds importés)."""
+    code = PROBE.format(heavy=HEAVY_MODULES)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code] + cli_args, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    heavy = []
+    for line in result.stderr.splitlines():
+        if line.startswith('HEAVY:'):
+            heavy = [m for m in line[len('HEAVY:'):].split(',') if m]
+    return elapsed, heavy
+
+def run_once_bare():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'])
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du temps de démarrage de progiclone")
+    parser.add_argument('--runs', type=int, default=10, help='Nombre de lancements par commande')
+    parser.add_argument('--max-ms', type=float, default=250.0,
+                        help='Temps de démarrage médian maximal toléré, en millisecondes')
+    args = parser.parse_args()
+
+    # Référence : interpréteur nu, pour isoler le coût propre à progiclone
+    baseline = statistics.median(run_once_bare() for _ in range(args.runs))
+    failed = False
+    for cli_args in (['--version'], ['--help']):
+        timings = []
+        heavy = set()
+        for _ in range(args.runs):
+            elapsed, imported = run_once(cli_args)
+            timings.append(elapsed)
+            heavy.update(imported)
+        median_ms = statistics.median(timings) * 1000
+        print(f"progiclone {' '.join(cli_args):<10} médiane {median_ms:7.1f} ms "
+              f"(interpréteur seul {baseline * 1000:.1f} ms, min {min(timings) * 1000:.1f} ms)")
+        if heavy:
+            print(f"  régression : modules lourds importés au démarrage : {', '.join(sorted(heavy))}")
+            failed = True
+        if median_ms > args.max_ms:
+            print(f"  régression : démarrage au-delà de {args.max_ms:.0f} ms")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
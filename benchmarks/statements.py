@@ -0,0 +1,100 @@
+# benchmarks/statements.py
+# Coût par ligne de l'écriture SQL selon le pilote (Python pur / extension C), le protocole
+# (texte / requêtes préparées) et la taille de lot (1 = une requête par ligne).
+# Sans serveur, seul le coût de construction des requêtes côté client est mesuré.
+import argparse
+import itertools
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def bench_query_build(fields, batch_size, batches):
+    """µs par ligne pour construire la requête UPDATE groupée : à chaque lot, puis via StatementCache."""
+    from progiclone.main import build_batch_update_query, StatementCache
+    start = time.perf_counter()
+    for _ in range(batches):
+        build_batch_update_query('llx_societe', 'rowid', fields, batch_size)
+    rebuilt = time.perf_counter() - start
+
+    cache = StatementCache(cnx=None)
+    key = ('update', 'llx_societe', tuple(fields), batch_size)
+    start = time.perf_counter()
+    for _ in range(batches):
+        cache.query(key, lambda: build_batch_update_query('llx_societe', 'rowid', fields, batch_size))
+    cached = time.perf_counter() - start
+    rows = batch_size * batches
+    return rebuilt / rows * 1e6, cached / rows * 1e6
+
+def bench_server(args, driver, prepared, batch_size):
+    """Anonymise la table synthétique et retourne (µs SQL par ligne, µs total par ligne)."""
+    import mysql.connector
+    from benchmarks.dataset import synthetic_tables, create_schema, populate
+    from progiclone import main as progiclone
+
+    connection_config = {
+        'host': args.mysql_host,
+        'port': args.mysql_port,
+        'user': args.mysql_user,
+        'password': args.mysql_password,
+        'database': args.mysql_database,
+        'use_pure': progiclone.driver_use_pure(driver),
+    }
+    cnx = mysql.connector.connect(**connection_config)
+    try:
+        tables = synthetic_tables([args.table])
+        create_schema(cnx, tables, 'mysql')
+        populate(cnx, tables, args.rows)
+        options = {'batch_size': batch_size, 'prepared': prepared, 'pool_size': 1000,
+                   'metrics': progiclone.RunMetrics()}
+        selected = [(t, f) for t, f in progiclone.tables_to_anonymize if t == args.table]
+        selected = progiclone.apply_table_schemas(cnx, progiclone.apply_pool_options(selected, options), options)
+        for table_name, fields_dict in selected:
+            progiclone.anonymize_table(cnx, table_name, fields_dict, progiclone.primary_keys,
+                                       progiclone.table_labels, options)
+        metrics = options['metrics'].table(args.table)
+    finally:
+        cnx.close()
+    rows = metrics.rows or 1
+    return metrics.phases['database'] / rows * 1e6, metrics.elapsed / rows * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût par ligne des requêtes d'écriture de progiclone")
+    parser.add_argument('--table', default='llx_societe', help='Table synthétique mesurée (défaut: llx_societe)')
+    parser.add_argument('--rows', type=int, default=20000, help='Lignes de la table synthétique')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 500],
+                        help='Tailles de lot mesurées (1 = une requête par ligne)')
+    parser.add_argument('--offline', action='store_true', help='Mesurer uniquement la construction des requêtes')
+    parser.add_argument('--mysql-host', default='127.0.0.1')
+    parser.add_argument('--mysql-port', type=int, default=3306)
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default=os.environ.get('PROGICLONE_BENCH_PASSWORD', ''),
+                        help='Mot de passe MySQL (ou PROGICLONE_BENCH_PASSWORD)')
+    parser.add_argument('--mysql-database', default='progiclone_bench',
+                        help='Base de travail, entièrement réécrite (défaut: progiclone_bench)')
+    args = parser.parse_args()
+
+    from progiclone.main import tables_to_anonymize
+    fields = list(dict(tables_to_anonymize)[args.table])
+    print(f"Construction des requêtes ({args.table}, {len(fields)} colonnes) :")
+    for batch_size in args.batch_sizes:
+        rebuilt, cached = bench_query_build(fields, batch_size, max(1, 20000 // batch_size))
+        print(f"  lot de {batch_size:>5} : {rebuilt:8.2f} µs/ligne reconstruite, {cached:8.3f} µs/ligne en cache")
+    if args.offline:
+        return
+
+    import mysql.connector
+    drivers = ['pure'] + (['c'] if mysql.connector.HAVE_CEXT else [])
+    if not mysql.connector.HAVE_CEXT:
+        print("Extension C de mysql-connector absente : seul le pilote 'pure' est mesuré.")
+    print(f"\nÉcriture de {args.rows} lignes ({args.mysql_database}@{args.mysql_host}) :")
+    for driver, prepared, batch_size in itertools.product(drivers, (False, True), args.batch_sizes):
+        sql_cost, total_cost = bench_server(args, driver, prepared, batch_size)
+        protocol = 'préparé' if prepared else 'texte'
+        print(f"  pilote {driver:<4} {protocol:<7} lot de {batch_size:>5} : "
+              f"{sql_cost:8.1f} µs/ligne SQL, {total_cost:8.1f} µs/ligne au total")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+# progiclone/clone.py
+# Mode clone : copie en flux d'une base Dolibarr source vers une base cible, en une seule passe.
+# Les tables prises en charge sont anonymisées à la volée : aucune donnée d'origine de ces tables
+# n'est écrite sur la cible. La source n'est jamais modifiée.
+import logging
+import time
+from progiclone.fields import fake, generate_rows, unwrap_field, PseudonymizedField
+from progiclone.metrics import table_metrics
+from progiclone.session import (
+    DEFAULT_BATCH_SIZE, commit_interval, ChunkedCommitter, apply_bulk_session, profile_connection,
+)
+
+# Tables de travail de Progiclone, jamais recopiées
+WORK_TABLE_SUFFIXES = ('_progiclone_new', '_progiclone_old', '_progiclone_stage')
+
+def list_source_tables(cnx, requested=None):
+    """Retourne [(table, lignes estimées)] des tables de base de la source, les plus grosses d'abord."""
+    cursor = cnx.cursor()
+    cursor.execute(
+        "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'"
+    )
+    tables = [
+        (table_name, int(rows or 0)) for table_name, rows in cursor.fetchall()
+        if not table_name.endswith(WORK_TABLE_SUFFIXES) and (not requested or table_name in requested)
+    ]
+    return sorted(tables, key=lambda item: item[1], reverse=True)
+
+def copyable_columns(cnx, table_name):
+    """Colonnes à recopier, dans l'ordre de la table (les colonnes générées sont recalculées par la cible)."""
+    cursor = cnx.cursor()
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+        "AND TABLE_NAME = %s AND EXTRA NOT LIKE '%%GENERATED%%' ORDER BY ORDINAL_POSITION",
+        (table_name,)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+def prepare_target_session(cnx, options):
+    """Réglages de session de la cible : pas de contrôle des clés étrangères (tables copiées dans
+    n'importe quel ordre) et NO_AUTO_VALUE_ON_ZERO comme mysqldump, plus --bulk-session si demandé."""
+    cursor = cnx.cursor()
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+    cursor.execute("SET SESSION sql_mode = 'NO_AUTO_VALUE_ON_ZERO'")
+    if options.get('bulk_session'):
+        _, failures = apply_bulk_session(cnx)
+        for variable, error in failures:
+            logging.debug(f"Réglage de session non appliqué sur la cible : {variable} ({error})")
+
+def create_target_tables(source_cnx, target_cnx, table_names):
+    """Recrée sur la cible la structure des tables de la source (SHOW CREATE TABLE)."""
+    source_cursor = source_cnx.cursor()
+    target_cursor = target_cnx.cursor()
+    for table_name in table_names:
+        source_cursor.execute(f"SHOW CREATE TABLE `{table_name}`")
+        create_statement = source_cursor.fetchone()[1]
+        target_cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
+        target_cursor.execute(create_statement)
+
+def build_insert_query(table_name, columns, row_count):
+    """Construit un INSERT multi-lignes de `row_count` lignes."""
+    row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    column_list = ", ".join(f"`{c}`" for c in columns)
+    return f"INSERT INTO `{table_name}` ({column_list}) VALUES " + ", ".join([row] * row_count)
+
+def anonymize_batch(rows, plan):
+    """Remplace, dans les lignes lues, les colonnes du plan [(index, générateur)] par des valeurs fictives."""
+    # Les champs pseudonymisés dépendent de la valeur d'origine lue sur la source
+    sources = {
+        i: [row[index] for row in rows]
+        for i, (index, gen) in enumerate(plan) if isinstance(unwrap_field(gen)[0], PseudonymizedField)
+    }
+    generated = generate_rows([gen for _, gen in plan], range(len(rows)), sources)
+    anonymized = []
+    for row, (_, values) in zip(rows, generated):
+        row = list(row)
+        for (index, _), value in zip(plan, values):
+            row[index] = value
+        anonymized.append(row)
+    return anonymized
+
+def copy_table(source_config, target_config, table_name, fields_dict, options, progress, seed=None):
+    """Copie une table de la source vers la cible par INSERT multi-lignes, anonymisée si `fields_dict`.
+
+    La lecture se fait en flux (curseur non bufferisé, `batch_size` lignes à la fois) : la mémoire
+    utilisée ne dépend pas de la taille de la table. Retourne le nombre de lignes copiées.
+    """
+    import mysql.connector
+    fake.use_new_instance(seed)
+    stats = table_metrics(options, table_name)
+    stats.engine = 'clone'
+    started = time.perf_counter()
+    batch_size = options.get('batch_size', DEFAULT_BATCH_SIZE)
+    source_cnx = profile_connection(mysql.connector.connect(**source_config), options)
+    target_cnx = profile_connection(mysql.connector.connect(**target_config), options)
+    try:
+        prepare_target_session(target_cnx, options)
+        columns = copyable_columns(source_cnx, table_name)
+        plan = [(index, fields_dict[column]) for index, column in enumerate(columns)
+                if fields_dict and column in fields_dict]
+        commit_rows, commit_seconds = commit_interval(options, table_name)
+        committer = ChunkedCommitter(target_cnx, commit_rows, commit_seconds, stats=stats)
+
+        source_cursor = source_cnx.cursor()
+        target_cursor = target_cnx.cursor()
+        column_list = ", ".join(f"`{c}`" for c in columns)
+        source_cursor.execute(f"SELECT {column_list} FROM `{table_name}`")
+        copied = 0
+        while True:
+            start = time.perf_counter()
+            rows = source_cursor.fetchmany(batch_size)
+            stats.add('read', time.perf_counter() - start)
+            if not rows:
+                break
+            if plan:
+                start = time.perf_counter()
+                rows = anonymize_batch(rows, plan)
+                stats.add('generation', time.perf_counter() - start)
+            params = [value for row in rows for value in row]
+            start = time.perf_counter()
+            target_cursor.execute(build_insert_query(table_name, columns, len(rows)), params)
+            stats.add('database', time.perf_counter() - start, rows=len(rows))
+            copied += len(rows)
+            progress.update(len(rows))
+            committer.add(len(rows), None)
+        committer.commit()
+        return copied
+    finally:
+        stats.elapsed += time.perf_counter() - started
+        source_cnx.close()
+        target_cnx.close()
+
+def clone_database(source_cnx, source_config, target_config, tables, options, requested=None):
+    """Clone la base source vers la cible, les tables de `tables` [(table, champs)] étant anonymisées.
+
+    La structure de toutes les tables est recréée sur la cible, puis les données sont copiées
+    par `jobs` workers en parallèle, les plus grosses tables d'abord. Retourne
+    {table: lignes copiées} ; une table en erreur est absente du résultat.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import mysql.connector
+    from tqdm import tqdm
+
+    fields_by_table = dict(tables)
+    source_tables = list_source_tables(source_cnx, requested)
+    if not source_tables:
+        print("\033[93mAucune table à cloner.\033[0m")
+        return {}
+
+    print(f"\n\033[96mCréation de {len(source_tables)} table(s) sur la base cible "
+          f"{target_config['database']}@{target_config['host']}...\033[0m")
+    target_cnx = mysql.connector.connect(**target_config)
+    try:
+        prepare_target_session(target_cnx, options)
+        create_target_tables(source_cnx, target_cnx, [table_name for table_name, _ in source_tables])
+    finally:
+        target_cnx.close()
+
+    jobs = max(1, min(options.get('jobs', 1), len(source_tables)))
+    anonymized = sum(1 for table_name, _ in source_tables if table_name in fields_by_table)
+    print(f"\033[96mCopie de {len(source_tables)} table(s) dont {anonymized} anonymisée(s) à la volée, "
+          f"{jobs} en parallèle...\033[0m")
+
+    base_seed = options.get('seed')
+    results = {}
+
+    def run(index, table_name, estimated_rows):
+        seed = base_seed + index if base_seed is not None else None
+        label = "Anonymisation" if table_name in fields_by_table else "Copie"
+        with tqdm(total=estimated_rows or None, desc=f"{label} {table_name}", unit="enregistrement",
+                  position=index % jobs, leave=False) as progress:
+            return copy_table(source_config, target_config, table_name, fields_by_table.get(table_name),
+                              options, progress, seed)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(run, index, table_name, rows): table_name
+            for index, (table_name, rows) in enumerate(source_tables)
+        }
+        for future, table_name in futures.items():
+            try:
+                results[table_name] = future.result()
+            except Exception as e:
+                print(f"\033[91mErreur lors de la copie de {table_name}: {e}\033[0m")
+    return results
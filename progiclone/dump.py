@@ -0,0 +1,178 @@
+# progiclone/dump.py
+# Anonymisation hors ligne d'un fichier mysqldump (éventuellement compressé en gzip), en flux :
+# seules les instructions INSERT des tables ciblées sont réécrites, tout le reste est recopié tel quel.
+import gzip
+import io
+import os
+import re
+import sys
+from progiclone.fields import generate_rows, PseudonymizedField
+
+INSERT_RE = re.compile(r"^((?:INSERT(?:\s+IGNORE)?|REPLACE)\s+INTO\s+`([^`]+)`\s*(?:\(([^)]*)\)\s*)?VALUES\s*)", re.I)
+CREATE_RE = re.compile(r"^CREATE TABLE (?:IF NOT EXISTS )?`([^`]+)`", re.I)
+COLUMN_RE = re.compile(r"^\s+`([^`]+)`\s")
+# Une valeur entre apostrophes (avec préfixe de jeu de caractères éventuel), une ponctuation
+# de structure, ou une valeur brute (nombre, NULL, 0x...)
+TOKEN_RE = re.compile(r"(?:_\w+\s*)?'(?:[^'\\]|\\.|'')*'|[(),]|[^(),']+", re.S)
+
+SQL_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    "'": "\\'",
+    '\n': '\\n',
+    '\r': '\\r',
+    '\0': '\\0',
+    '\x1a': '\\Z',
+})
+
+SQL_UNESCAPES = {'0': '\0', 'n': '\n', 'r': '\r', 't': '\t', 'b': '\b', 'Z': '\x1a'}
+UNESCAPE_RE = re.compile(r"\\(.)|''", re.S)
+
+class DumpError(Exception):
+    """Dump impossible à anonymiser sans risquer d'y laisser des données d'origine."""
+
+def sql_unquote(literal):
+    """Retourne la valeur d'un littéral SQL écrit par mysqldump (None pour NULL)."""
+    if literal == "NULL":
+        return None
+    if not literal.startswith("'"):
+        return literal
+    return UNESCAPE_RE.sub(
+        lambda m: "'" if m.group(1) is None else SQL_UNESCAPES.get(m.group(1), m.group(1)),
+        literal[1:-1]
+    )
+
+def sql_quote(value):
+    """Formate une valeur comme un littéral SQL à la manière de mysqldump."""
+    if value is None:
+        return "NULL"
+    return "'" + str(value).translate(SQL_ESCAPES) + "'"
+
+def parse_values(text):
+    """Découpe la partie VALUES d'un INSERT en lignes de littéraux SQL bruts."""
+    rows = []
+    row = None
+    current = ""
+    for token in TOKEN_RE.findall(text):
+        if row is None:
+            if token == "(":
+                row = []
+                current = ""
+            continue
+        if token == ",":
+            row.append(current)
+            current = ""
+        elif token == ")":
+            row.append(current)
+            rows.append(row)
+            row = None
+        else:
+            current += token
+    return rows
+
+def open_dump(path, mode):
+    """Ouvre un dump en texte ('-' pour stdin/stdout), compressé en gzip si l'extension est .gz."""
+    kwargs = {'encoding': 'utf-8', 'errors': 'surrogateescape', 'newline': ''}
+    if path == '-':
+        stream = sys.stdin.buffer if mode == 'r' else sys.stdout.buffer
+        return io.TextIOWrapper(stream, **kwargs)
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', **kwargs)
+    return open(path, mode, **kwargs)
+
+class DumpAnonymizer:
+    """Réécrit les instructions INSERT d'un dump avec les générateurs des tables à anonymiser."""
+    def __init__(self, tables):
+        self.fields = dict(tables)
+        self.columns = {}
+        self.rows_rewritten = {}
+
+    def plan(self, table_name, columns):
+        """Retourne [(index de colonne, générateur)] pour les colonnes anonymisées présentes."""
+        fields_dict = self.fields[table_name]
+        return [(index, fields_dict[column]) for index, column in enumerate(columns) if column in fields_dict]
+
+    def rewrite_insert(self, statement, match):
+        prefix, table_name, column_list = match.group(1), match.group(2), match.group(3)
+        if column_list:
+            columns = [c.strip().strip('`') for c in column_list.split(',')]
+        else:
+            columns = self.columns.get(table_name)
+        if not columns:
+            # Recopier l'INSERT laisserait les données d'origine dans le dump anonymisé
+            raise DumpError(f"colonnes de {table_name} inconnues : le dump ne contient ni CREATE TABLE "
+                            "ni liste de colonnes (relancez mysqldump sans --no-create-info ou avec --complete-insert)")
+
+        plan = self.plan(table_name, columns)
+        if not plan:
+            return statement
+
+        rows = parse_values(statement[len(prefix):])
+        # Les champs pseudonymisés dépendent de la valeur d'origine lue dans le dump
+        sources = {
+            i: [sql_unquote(row[index]) for row in rows]
+            for i, (index, gen) in enumerate(plan) if isinstance(gen, PseudonymizedField)
+        }
+        generated = generate_rows([gen for _, gen in plan], range(len(rows)), sources)
+        for row, (_, values) in zip(rows, generated):
+            for (index, _), value in zip(plan, values):
+                row[index] = sql_quote(value)
+        self.rows_rewritten[table_name] = self.rows_rewritten.get(table_name, 0) + len(rows)
+        return prefix + ",".join("(" + ",".join(row) + ")" for row in rows) + ";\n"
+
+    def process(self, source, target, progress=None):
+        """Lit le dump `source` ligne par ligne et écrit le dump anonymisé dans `target`."""
+        create_table = None
+        pending = ""
+        for line in source:
+            if progress is not None:
+                progress.update(len(line))
+
+            if pending:
+                pending += line
+                if not line.rstrip().endswith(";"):
+                    continue
+                line, pending = pending, ""
+
+            if create_table is not None:
+                column = COLUMN_RE.match(line)
+                if column:
+                    self.columns[create_table].append(column.group(1))
+                elif line.startswith(")"):
+                    create_table = None
+            else:
+                create = CREATE_RE.match(line)
+                if create and create.group(1) in self.fields:
+                    create_table = create.group(1)
+                    self.columns[create_table] = []
+
+            match = INSERT_RE.match(line)
+            if match and match.group(2) in self.fields:
+                if not line.rstrip().endswith(";"):
+                    pending = line
+                    continue
+                line = self.rewrite_insert(line, match)
+            target.write(line)
+
+        if pending:
+            raise DumpError(f"INSERT de {INSERT_RE.match(pending).group(2)} non terminé en fin de dump "
+                            "(fichier tronqué ?)")
+
+def anonymize_dump(input_path, output_path, tables):
+    """Anonymise un fichier mysqldump sans base de données, à mémoire constante.
+
+    Lève DumpError si une ligne d'une table ciblée ne peut pas être réécrite ; en cas d'erreur, le
+    fichier de sortie incomplet est supprimé.
+    """
+    from tqdm import tqdm
+    anonymizer = DumpAnonymizer(tables)
+    total = os.path.getsize(input_path) if input_path != '-' and not input_path.endswith('.gz') else None
+    try:
+        with open_dump(input_path, 'r') as source, open_dump(output_path, 'w') as target:
+            with tqdm(total=total, desc="Anonymisation du dump", unit="B", unit_scale=True,
+                      file=sys.stderr) as progress:
+                anonymizer.process(source, target, progress)
+    except Exception:
+        if output_path != '-' and os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    return anonymizer.rows_rewritten
@@ -0,0 +1,412 @@
+# progiclone/fields.py
+# Générateurs de champs : Faker par thread, réservoirs de valeurs, pseudonymisation cohérente,
+# champs déclaratifs (constante, fournisseur Faker, référence hexadécimale) et plan de génération
+# des lignes. Module partagé par main, dump, clone et rules.
+import hashlib
+import hmac
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from progiclone.profiling import ProfiledField
+
+# Nombre maximal de correspondances gardées en mémoire par la pseudonymisation cohérente
+DEFAULT_PSEUDONYMIZE_CACHE_SIZE = 100000
+
+# Taille par défaut des réservoirs de valeurs fictives (par fournisseur Faker)
+DEFAULT_POOL_SIZE = 1000
+
+# Essais de génération d'une valeur encore jamais produite, pour un champ `unique`
+UNIQUE_ATTEMPTS = 100
+
+class ThreadLocalFaker:
+    """Faker propre à chaque thread : un worker peut utiliser sa propre instance et sa propre graine.
+
+    Faker n'est importé et instancié qu'au premier appel d'un fournisseur : `--help`, `--version`
+    ou une exécution sans table à traiter ne paient pas son coût de chargement.
+    """
+    def __init__(self, locale):
+        self.locale = locale
+        self._default = None
+        self._default_lock = threading.Lock()
+        self._local = threading.local()
+
+    def new_instance(self):
+        from faker import Faker
+        return Faker(self.locale)
+
+    def default_instance(self):
+        if self._default is None:
+            with self._default_lock:
+                if self._default is None:
+                    self._default = self.new_instance()
+        return self._default
+
+    def use_new_instance(self, seed=None):
+        """Crée une instance Faker dédiée au thread courant."""
+        instance = self.new_instance()
+        if seed is not None:
+            instance.seed_instance(seed)
+        self._local.instance = instance
+
+    @contextmanager
+    def seeded(self, seed):
+        """Utilise temporairement, dans le thread courant, une instance Faker initialisée avec `seed`."""
+        instance = getattr(self._local, 'seeded_instance', None)
+        if instance is None:
+            instance = self._local.seeded_instance = self.new_instance()
+        instance.seed_instance(seed)
+        previous = getattr(self._local, 'instance', None)
+        self._local.instance = instance
+        try:
+            yield instance
+        finally:
+            if previous is None:
+                del self._local.instance
+            else:
+                self._local.instance = previous
+
+    def current(self):
+        """Instance Faker du thread courant (dédiée, à graine temporaire ou par défaut)."""
+        instance = getattr(self._local, 'instance', None)
+        return instance if instance is not None else self.default_instance()
+
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
+
+fake = ThreadLocalFaker('fr_FR')
+
+class ValuePool:
+    """Réservoir de valeurs fictives pré-générées pour un fournisseur Faker coûteux.
+
+    Les `size` premiers tirages appellent le générateur (le réservoir se remplit au fil de
+    l'eau, une petite table ne paie donc rien de plus), les suivants piochent par index
+    aléatoire dans les valeurs déjà produites.
+    """
+    def __init__(self, generator, size=DEFAULT_POOL_SIZE, name=None):
+        self.generator = generator
+        self.size = size
+        self.name = name
+        self.values = []
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def _fill(self, count):
+        """Ajoute jusqu'à `count` valeurs distinctes au réservoir et les retourne."""
+        added = []
+        attempts = 0
+        while len(added) < count and attempts < count * 3 + 10:
+            attempts += 1
+            value = self.generator()
+            if value in self._seen:
+                continue
+            self._seen.add(value)
+            added.append(value)
+        self.values.extend(added)
+        return added
+
+    def draw(self, count):
+        """Retourne `count` valeurs, en complétant le réservoir s'il n'est pas encore plein."""
+        with self._lock:
+            fresh = []
+            missing = self.size - len(self.values)
+            if missing > 0:
+                fresh = self._fill(min(missing, count))
+                if len(self.values) < self.size and len(fresh) < min(missing, count):
+                    # Le fournisseur ne produit plus de valeurs nouvelles : le réservoir est complet
+                    self.size = len(self.values)
+            remaining = count - len(fresh)
+            if remaining <= 0:
+                return fresh
+            if not self.values:
+                return fresh + [self.generator() for _ in range(remaining)]
+            # Tirage par le Faker du thread : reproductible avec --seed (et la graine de chaque plage)
+            return fresh + fake.current().random.choices(self.values, k=remaining)
+
+    def __call__(self):
+        return self.draw(1)[0]
+
+    def resized(self, size):
+        """Retourne un nouveau réservoir de même générateur avec une autre taille."""
+        return ValuePool(self.generator, size, self.name)
+
+class UniqueValueError(Exception):
+    """Un champ `unique` n'a pas trouvé de valeur inédite : l'espace de valeurs du générateur est épuisé."""
+
+class UniqueField:
+    """Champ dont les valeurs ne se répètent pas au sein d'une table (réglage `unique` de `pools`).
+
+    Une valeur déjà produite est régénérée, au plus `attempts` fois avant d'abandonner
+    (UniqueValueError). Les valeurs vues sont oubliées par `reset`, à la fin de chaque table.
+    """
+    def __init__(self, generator, attempts=UNIQUE_ATTEMPTS):
+        self.generator = generator
+        self.attempts = attempts
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            for _ in range(self.attempts):
+                value = self.generator()
+                if value not in self._seen:
+                    self._seen.add(value)
+                    return value
+        raise UniqueValueError(f"aucune valeur unique obtenue après {self.attempts} essais "
+                               f"({len(self._seen)} valeurs déjà produites)")
+
+    def reset(self):
+        with self._lock:
+            self._seen = set()
+
+class Pseudonymizer:
+    """Pseudonymisation cohérente : une valeur d'origine donne toujours la même valeur fictive.
+
+    La graine du générateur est dérivée de la valeur d'origine par HMAC-SHA256 avec un secret,
+    et un cache LRU borné évite de régénérer les valeurs répétées.
+    """
+    def __init__(self, secret, cache_size=DEFAULT_PSEUDONYMIZE_CACHE_SIZE):
+        self.secret = secret.encode('utf-8')
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seed_for(self, kind, value):
+        message = f"{kind}\x00{value}".encode('utf-8', 'surrogateescape')
+        return int.from_bytes(hmac.new(self.secret, message, hashlib.sha256).digest()[:8], 'big')
+
+    def pseudonymize(self, kind, generator, value):
+        """Retourne la valeur fictive associée à `value` (les valeurs vides restent vides)."""
+        if value is None or value == "":
+            return value
+        key = (kind, value)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        with fake.seeded(self.seed_for(kind, value)):
+            fake_value = generator()
+        with self._lock:
+            self._cache[key] = fake_value
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return fake_value
+
+class PseudonymizedField:
+    """Champ dont la valeur fictive est dérivée de la valeur d'origine de la colonne."""
+    def __init__(self, kind, generator, pseudonymizer):
+        self.kind = kind
+        self.generator = generator
+        self.pseudonymizer = pseudonymizer
+
+    def map_values(self, originals):
+        return [self.pseudonymizer.pseudonymize(self.kind, self.generator, value) for value in originals]
+
+    def __call__(self):
+        # Sans valeur d'origine connue, on retombe sur une valeur aléatoire
+        return self.generator()
+
+# Jokers des motifs Faker (bothify, numerify) : seul `#` a un équivalent SQL
+PATTERN_WILDCARDS = '#%!@?'
+
+def sql_random_hex(pk_field):
+    """32 caractères hexadécimaux aléatoires calculés par le serveur.
+
+    RAND() n'a qu'un état de 30 bits : la clé primaire est mêlée au hachage pour que deux
+    lignes ne puissent pas recevoir la même valeur.
+    """
+    return f"MD5(CONCAT({pk_field}, '-', RAND()))"
+
+class ConstantField:
+    """Champ de valeur constante : une colonne entière est produite sans appel par ligne."""
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+    def column(self, count):
+        return [self.value] * count
+
+    def sql_expression(self, pk_field):
+        return "%s", [self.value]
+
+class FakerField:
+    """Appel d'un fournisseur Faker avec des arguments fixes.
+
+    Le fournisseur est résolu une fois par lot sur l'instance Faker du thread, au lieu d'un
+    passage par ThreadLocalFaker et d'une lambda à chaque ligne.
+    """
+    def __init__(self, provider, **kwargs):
+        self.provider = provider
+        self.kwargs = kwargs
+
+    def __call__(self):
+        return getattr(fake.current(), self.provider)(**self.kwargs)
+
+    def column(self, count):
+        method = getattr(fake.current(), self.provider)
+        if not self.kwargs:
+            return [method() for _ in range(count)]
+        kwargs = self.kwargs
+        return [method(**kwargs) for _ in range(count)]
+
+    def sql_expression(self, pk_field):
+        """Équivalent SQL du fournisseur ((expression, paramètres)), ou None s'il n'en a pas."""
+        if self.provider == 'uuid4' and not self.kwargs:
+            # Format UUID sur un hachage aléatoire : UUID() (v1) exposerait l'adresse MAC et l'horloge du serveur
+            return f"INSERT(INSERT(INSERT(INSERT({sql_random_hex(pk_field)}, 21, 0, '-'), 17, 0, '-'), " \
+                   f"13, 0, '-'), 9, 0, '-')", []
+        if self.provider in ('bothify', 'numerify') and set(self.kwargs) == {'text'}:
+            return sql_digit_pattern(self.kwargs['text'])
+        if self.provider == 'random_element' and set(self.kwargs) == {'elements'}:
+            elements = list(self.kwargs['elements'])
+            return f"ELT(1 + FLOOR(RAND() * {len(elements)}), {', '.join(['%s'] * len(elements))})", elements
+        return None
+
+class HexField:
+    """Référence fictive : préfixe, `length` caractères hexadécimaux aléatoires (UUID4) et suffixe."""
+    def __init__(self, prefix='', length=32, suffix=''):
+        self.prefix = prefix
+        self.length = length
+        self.suffix = suffix
+
+    def __call__(self):
+        return self.column(1)[0]
+
+    def column(self, count):
+        uuid4 = fake.current().uuid4
+        prefix, length, suffix = self.prefix, self.length, self.suffix
+        return [prefix + uuid4().replace('-', '')[:length] + suffix for _ in range(count)]
+
+    def sql_expression(self, pk_field):
+        return f"CONCAT(%s, SUBSTR({sql_random_hex(pk_field)}, 1, {self.length}), %s)", [self.prefix, self.suffix]
+
+def sql_digit_pattern(text):
+    """Expression SQL d'un motif Faker dont les seuls jokers sont des `#` (chiffres), ou None.
+
+    Chaque suite de `#` devient LPAD(FLOOR(RAND() * 10^n), n, '0') (par tranches de 9 chiffres),
+    les autres caractères sont passés en paramètres.
+    """
+    if any(c in PATTERN_WILDCARDS for c in text.replace('#', '')):
+        return None
+    parts, params = [], []
+    for literal, digits in re.findall(r"([^#]*)(#*)", text):
+        if literal:
+            parts.append("%s")
+            params.append(literal)
+        while digits:
+            n = min(len(digits), 9)
+            parts.append(f"LPAD(FLOOR(RAND() * {10 ** n}), {n}, '0')")
+            digits = digits[n:]
+    if not parts:
+        return "%s", [""]
+    return (f"CONCAT({', '.join(parts)})" if len(parts) > 1 else parts[0]), params
+
+class TruncatedField:
+    """Champ dont les valeurs sont tronquées à la longueur de la colonne (VARCHAR(n), CHAR(n))."""
+    def __init__(self, inner, max_length):
+        self.inner = inner
+        self.max_length = max_length
+
+    def __call__(self):
+        value = self.inner()
+        return value[:self.max_length] if isinstance(value, str) else value
+
+def unwrap_field(gen):
+    """Retourne (générateur, longueur maximale ou None) pour un champ éventuellement tronqué ou profilé."""
+    if isinstance(gen, ProfiledField):
+        gen = gen.inner
+    if isinstance(gen, TruncatedField):
+        return gen.inner, gen.max_length
+    return gen, None
+
+def reset_unique_fields(fields_dict):
+    """Oublie les valeurs déjà produites par les champs `unique` d'une table."""
+    for gen in fields_dict.values():
+        gen, _ = unwrap_field(gen)
+        if isinstance(gen, UniqueField):
+            gen.reset()
+
+def sql_pushdown_expression(gen, pk_field):
+    """Expression SQL ((expression, paramètres)) produisant les valeurs du champ côté serveur, ou None."""
+    gen, max_length = unwrap_field(gen)
+    sql_expression = getattr(gen, 'sql_expression', None)
+    if sql_expression is None or isinstance(gen, PseudonymizedField):
+        return None
+    expression = sql_expression(pk_field)
+    if expression is None:
+        return None
+    sql, params = expression
+    return (f"SUBSTR({sql}, 1, {max_length})" if max_length else sql), params
+
+def source_fields(fields_dict):
+    """Retourne les colonnes dont la valeur d'origine doit être lue (champs pseudonymisés)."""
+    return [field for field, gen in fields_dict.items() if isinstance(unwrap_field(gen)[0], PseudonymizedField)]
+
+class RowPlan:
+    """Plan de génération compilé d'une table : une étape par colonne, résolue une seule fois.
+
+    Chaque étape produit une colonne entière du lot (réservoir, constante, fournisseur Faker
+    résolu une fois, ou appel du générateur par ligne), puis les colonnes sont assemblées en
+    tuples (id, valeurs).
+    """
+    def __init__(self, generators):
+        self.steps = []
+        for field in generators:
+            gen, max_length = unwrap_field(field)
+            if isinstance(gen, ValuePool):
+                produce = gen.draw
+            elif isinstance(gen, (ConstantField, FakerField, HexField)):
+                produce = gen.column
+            else:
+                produce = lambda count, gen=gen: [gen() for _ in range(count)]
+            profile = field if isinstance(field, ProfiledField) else None
+            self.steps.append((gen, produce, max_length, profile))
+
+    def build(self, row_ids, sources=None):
+        """Génère le lot : [(id, valeurs), ...] ; `sources` associe à l'index d'un champ
+        pseudonymisé les valeurs d'origine du lot."""
+        count = len(row_ids)
+        columns = []
+        for index, (gen, produce, max_length, profile) in enumerate(self.steps):
+            start = time.perf_counter()
+            if sources and index in sources:
+                column = gen.map_values(sources[index])
+            else:
+                column = produce(count)
+            if max_length:
+                column = [v[:max_length] if isinstance(v, str) and len(v) > max_length else v for v in column]
+            if profile is not None:
+                profile.record(time.perf_counter() - start, count)
+            columns.append(column)
+        return list(zip(row_ids, zip(*columns))) if columns else [(rid, ()) for rid in row_ids]
+
+def generate_rows(generators, row_ids, sources=None):
+    """Génère les valeurs d'un lot de lignes, colonne par colonne : [(id, valeurs), ...]."""
+    return RowPlan(generators).build(row_ids, sources)
+
+# Réservoirs partagés par les champs utilisant le même fournisseur
+company_pool = ValuePool(lambda: fake.company(), name='company')
+address_pool = ValuePool(lambda: fake.address().replace('\n', ', '), name='address')
+postcode_pool = ValuePool(lambda: fake.postcode(), name='postcode')
+city_pool = ValuePool(lambda: fake.city(), name='city')
+phone_pool = ValuePool(lambda: fake.phone_number(), name='phone')
+email_pool = ValuePool(lambda: fake.email(), name='email')
+url_pool = ValuePool(lambda: fake.url(), name='url')
+word_pool = ValuePool(lambda: fake.word(), name='word')
+last_name_pool = ValuePool(lambda: fake.last_name(), name='last_name')
+first_name_pool = ValuePool(lambda: fake.first_name(), name='first_name')
+job_pool = ValuePool(lambda: fake.job(), name='job')
+short_text_pool = ValuePool(lambda: fake.text(max_nb_chars=200), name='short_text')
+text_pool = ValuePool(lambda: fake.text(max_nb_chars=500), name='text')
+long_text_pool = ValuePool(lambda: fake.text(max_nb_chars=1000), name='long_text')
+
+# Réservoirs utilisables par nom dans les règles de la configuration (clé `rules`)
+BUILTIN_POOLS = {pool.name: pool for pool in (
+    company_pool, address_pool, postcode_pool, city_pool, phone_pool, email_pool, url_pool, word_pool,
+    last_name_pool, first_name_pool, job_pool, short_text_pool, text_pool, long_text_pool,
+)}
+
+short_import_key = HexField(length=14)
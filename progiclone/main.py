@@ -1,47 +1,3 @@
-# Vérifier les dépendances avant tout
-def check_dependencies():
-    """Vérifie et installe les dépendances requises."""
-    required_packages = [
-        'pyfiglet',
-        'tqdm',
-        'Faker',
-        'mysql-connector-python',
-        'requests',
-        'PyYAML',
-        'sshtunnel',
-    ]
-
-    def install(package):
-        print(f"Installation de {package}...")
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-        except subprocess.CalledProcessError:
-            print(f"\033[91mErreur lors de l'installation de {package}. Tentative avec pip3...\033[0m")
-            try:
-                subprocess.check_call(["pip3", "install", package])
-            except subprocess.CalledProcessError:
-                print(f"\033[91mÉchec de l'installation de {package}. Veuillez l'installer manuellement avec 'pip install {package}'\033[0m")
-                sys.exit(1)
-
-    print("Vérification des dépendances...")
-    for package in required_packages:
-        try:
-            if package == 'PyYAML':
-                import yaml
-            elif package == 'mysql-connector-python':
-                import mysql.connector
-            else:
-                __import__(package.lower().replace('-', '_'))
-        except ImportError:
-            print(f"Le module '{package}' est manquant. Installation automatique...")
-            install(package)
-
-    print("\n\033[92mToutes les dépendances sont présentes ou ont été installées avec succès.\033[0m\n")
-
-# Vérifier les dépendances avant tout
-if __name__ == "__main__":
-    check_dependencies()
-
 # Imports standards
 import sys
 import os
@@ -53,9 +9,90 @@ import json
 import getpass  # Pour masquer le mot de passe lors de la saisie
 import time
 import signal
+import random
+import threading
+from collections import deque
 from importlib import import_module
-import requests
 from progiclone import __version__
+from progiclone.profiling import Profiler
+from progiclone.metrics import TableMetrics, RunMetrics, table_metrics, timed_iter
+from progiclone.session import (
+    DEFAULT_BATCH_SIZE, DEFAULT_COMMIT_ROWS, commit_interval, ChunkedCommitter, apply_bulk_session, bulk_session,
+    profile_connection,
+)
+from progiclone.fields import (
+    DEFAULT_POOL_SIZE, DEFAULT_PSEUDONYMIZE_CACHE_SIZE, fake, ValuePool, UniqueField, UniqueValueError,
+    reset_unique_fields, Pseudonymizer,
+    PseudonymizedField, ConstantField, FakerField, HexField, TruncatedField, RowPlan, generate_rows,
+    source_fields, sql_pushdown_expression, short_import_key, company_pool, address_pool, postcode_pool,
+    city_pool, phone_pool, email_pool, url_pool, word_pool, last_name_pool, first_name_pool, job_pool,
+    short_text_pool, text_pool, long_text_pool,
+)
+
+# Modules importés par Progiclone, par paquet à installer
+REQUIRED_MODULES = [
+    ('pyfiglet', 'pyfiglet'),
+    ('tqdm', 'tqdm'),
+    ('Faker', 'faker'),
+    ('mysql-connector-python', 'mysql.connector'),
+    ('requests', 'requests'),
+    ('PyYAML', 'yaml'),
+]
+
+def check_dependencies():
+    """Vérifie, sans les importer, que les dépendances requises sont installées."""
+    from importlib.util import find_spec
+    missing = []
+    for package, module in REQUIRED_MODULES:
+        try:
+            if find_spec(module) is None:
+                missing.append(package)
+        except ImportError:
+            missing.append(package)
+    if missing:
+        print(f"\033[91mDépendances manquantes : {', '.join(missing)}")
+        print(f"Installez-les avec : pip install {' '.join(missing)}\033[0m")
+        sys.exit(1)
+
+# Moteurs d'écriture disponibles : UPDATE groupés ou LOAD DATA LOCAL INFILE + jointure
+ENGINES = ['update', 'infile', 'shadow']
+DEFAULT_ENGINE = 'update'
+
+# Nombre d'IDs lus par requête lors du parcours d'une table
+FETCH_SIZE = 10000
+
+# Pilotes mysql-connector : 'pure' (Python), 'c' (extension C) ou 'auto' (extension C si disponible)
+DRIVERS = ['auto', 'pure', 'c']
+DEFAULT_DRIVER = 'auto'
+
+# Nombre maximal de paramètres d'une requête préparée MySQL (au-delà : protocole texte)
+MAX_PREPARED_PARAMS = 65535
+
+# Colonnes pseudonymisées par défaut : une même valeur d'origine (e-mail, nom...) donne la même
+# valeur fictive dans toutes les tables
+DEFAULT_PSEUDONYMIZED_COLUMNS = [
+    "llx_societe.nom",
+    "llx_societe.email",
+    "llx_socpeople.lastname",
+    "llx_socpeople.firstname",
+    "llx_socpeople.email",
+    "llx_user.lastname",
+    "llx_user.firstname",
+    "llx_user.email",
+    "llx_actioncomm.email_from",
+    "llx_actioncomm.email_sender",
+    "llx_actioncomm.email_to",
+    "llx_ticket.origin_email",
+]
+
+# Répertoire local des fichiers de Progiclone (points de reprise, caches)
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.progiclone')
+
+# Nombre de lignes de la sortie d'erreur de ssh conservées pour le diagnostic
+STDERR_TAIL_LINES = 50
+
+# Durée de validité du résultat de la vérification des mises à jour (secondes)
+UPDATE_CHECK_TTL = 24 * 3600
 
 def parse_args():
     """Parse les arguments de la ligne de commande."""
@@ -92,7 +129,91 @@ def parse_args():
     
     # Tables à anonymiser
     parser.add_argument('--tables', nargs='+', help='Liste des tables à anonymiser (toutes si non spécifié)')
+
+    # Performances
+    perf_group = parser.add_argument_group('Performances')
+    perf_group.add_argument('--batch-size', type=int,
+                            help=f'Nombre de lignes mises à jour par requête (défaut: {DEFAULT_BATCH_SIZE})')
+    perf_group.add_argument('--engine', choices=ENGINES,
+                            help="Moteur d'écriture : 'update' (UPDATE groupés), 'infile' "
+                                 "(LOAD DATA LOCAL INFILE dans une table de transit) ou 'shadow' (copie dans "
+                                 f"une nouvelle table puis échange par RENAME TABLE) (défaut: {DEFAULT_ENGINE})")
+    perf_group.add_argument('--keep-original', action='store_true',
+                            help="Moteur 'shadow' : conserver la table d'origine sous le nom <table>_progiclone_old")
+    perf_group.add_argument('-j', '--jobs', type=int,
+                            help='Nombre de tables anonymisées en parallèle, une connexion par job (défaut: 1)')
+    perf_group.add_argument('--shards', type=int,
+                            help='Nombre de plages de clés primaires traitées en parallèle au sein '
+                                 "d'une table, une connexion par plage (défaut: 1)")
+    perf_group.add_argument('--seed', type=int,
+                            help='Graine de base des instances Faker (chaque plage utilise graine + numéro)')
+    perf_group.add_argument('--bulk-session', action='store_true',
+                            help='Désactiver binlog, contrôles de clés étrangères/unicité et journal général '
+                                 'pour la session (copies jetables uniquement, refusé sur un hôte de production)')
+    perf_group.add_argument('--driver', choices=DRIVERS,
+                            help="Pilote MySQL : 'pure' (Python), 'c' (extension C) ou 'auto' (extension C "
+                                 f"si elle est installée) (défaut: {DEFAULT_DRIVER})")
+    perf_group.add_argument('--prepared', action='store_true',
+                            help='Exécuter les UPDATE en requêtes préparées côté serveur, préparées une fois '
+                                 'par table et jeu de colonnes')
+    perf_group.add_argument('--sql-pushdown', action='store_true',
+                            help='Calculer côté serveur, par UPDATE sur des plages de clés, les colonnes exprimables '
+                                 'en SQL (constantes, références hexadécimales, motifs de chiffres, UUID)')
+    perf_group.add_argument('--skip-empty-columns', action='store_true',
+                            help='Ne pas réécrire les colonnes entièrement NULL ou vides')
+    perf_group.add_argument('--pool-size', type=int,
+                            help='Nombre de valeurs fictives pré-générées par fournisseur, 0 pour désactiver '
+                                 f'les réservoirs (défaut: {DEFAULT_POOL_SIZE})')
     
+    # Mode hors ligne
+    dump_group = parser.add_argument_group('Anonymisation de dump (hors ligne)')
+    dump_group.add_argument('--dump-in', help="Fichier mysqldump à anonymiser (.sql ou .sql.gz, '-' pour stdin)")
+    dump_group.add_argument('--dump-out', help="Fichier de sortie anonymisé (.sql ou .sql.gz, '-' pour stdout)")
+
+    # Clonage vers une base cible
+    clone_group = parser.add_argument_group('Clonage (source -> cible anonymisée)')
+    clone_group.add_argument('--clone', action='store_true',
+                             help='Copier la base vers la base cible en anonymisant à la volée (la source '
+                                  "n'est pas modifiée)")
+    clone_group.add_argument('--target-host', help='Hôte MySQL cible')
+    clone_group.add_argument('--target-port', type=int, help='Port MySQL cible (défaut: 3306)')
+    clone_group.add_argument('--target-user', help='Utilisateur MySQL cible')
+    clone_group.add_argument('--target-password', help='Mot de passe MySQL cible')
+    clone_group.add_argument('--target-database', help='Nom de la base de données cible')
+
+    # Planification
+    plan_group = parser.add_argument_group('Planification')
+    plan_group.add_argument('--plan', action='store_true',
+                            help='Estimer la durée par table (lot d\'essai écrit puis annulé) sans rien modifier')
+    plan_group.add_argument('--exact-count', action='store_true',
+                            help='Compter exactement les lignes (COUNT) au lieu de l\'estimation information_schema')
+
+    # Reprise après interruption
+    resume_group = parser.add_argument_group('Reprise')
+    resume_group.add_argument('--resume', action='store_true',
+                              help="Reprendre l'anonymisation là où l'exécution précédente s'est arrêtée")
+    resume_group.add_argument('--checkpoint-file',
+                              help=f'Chemin du fichier de point de reprise (défaut: {CACHE_DIR}/checkpoint-<hôte>-<base>.json)')
+    resume_group.add_argument('--commit-rows', type=int,
+                              help=f'Valider la transaction tous les N enregistrements (défaut: {DEFAULT_COMMIT_ROWS})')
+    resume_group.add_argument('--commit-seconds', type=float,
+                              help='Valider la transaction au moins toutes les N secondes')
+
+    # Mesures
+    metrics_group = parser.add_argument_group('Mesures')
+    metrics_group.add_argument('--metrics-json',
+                               help='Écrire les mesures par table (débit, temps par phase, latences) dans ce fichier JSON')
+    metrics_group.add_argument('--metrics-prometheus',
+                               help='Écrire les mesures au format textfile de Prometheus (node_exporter) dans ce fichier')
+    metrics_group.add_argument('--profile', action='store_true',
+                               help='Chronométrer chaque générateur de champ et chaque classe de requête SQL, '
+                                    'puis afficher les champs et tables les plus coûteux')
+    metrics_group.add_argument('--profile-dump',
+                               help='Avec --profile, écrire aussi un profil cProfile (pstats) dans ce fichier')
+
+    parser.add_argument('--no-update-check', action='store_true',
+                        help="Ne pas vérifier les mises à jour sur PyPI (ou PROGICLONE_NO_UPDATE_CHECK=1)")
+
     # Mode verbeux
     parser.add_argument('-v', '--verbose', action='store_true', help='Mode verbeux')
     
@@ -108,6 +229,7 @@ def load_config_file(config_path):
         if ext == '.json':
             return json.load(f)
         elif ext in ['.yml', '.yaml']:
+            import yaml
             return yaml.safe_load(f)
         else:
             raise ValueError("Le fichier de configuration doit être au format JSON ou YAML")
@@ -141,25 +263,201 @@ def get_config_from_args(args):
             
     return config
 
-def check_updates():
-    try:
-        response = requests.get("https://pypi.org/pypi/progiclone/json", timeout=5)
-        if response.status_code != 200:
-            logging.debug(f"Erreur lors de la vérification des mises à jour : Code {response.status_code}")
+def get_run_options(args, config):
+    """Construit les options d'anonymisation (la ligne de commande prime sur le fichier de config)."""
+    file_options = config.get('options') or {}
+    batch_size = args.batch_size or file_options.get('batch_size', DEFAULT_BATCH_SIZE)
+    if int(batch_size) < 1:
+        raise ValueError("La taille de lot (batch_size) doit être supérieure ou égale à 1")
+    engine = args.engine or file_options.get('engine', DEFAULT_ENGINE)
+    table_engines = file_options.get('table_engines') or {}
+    for name in [engine] + list(table_engines.values()):
+        if name not in ENGINES:
+            raise ValueError(f"Moteur inconnu '{name}' (valeurs possibles : {', '.join(ENGINES)})")
+    pool_size = args.pool_size if args.pool_size is not None else file_options.get('pool_size', DEFAULT_POOL_SIZE)
+    if int(pool_size) < 0:
+        raise ValueError("La taille des réservoirs (pool_size) ne peut pas être négative")
+    jobs = args.jobs or file_options.get('jobs', 1)
+    if int(jobs) < 1:
+        raise ValueError("Le nombre de jobs doit être supérieur ou égal à 1")
+    shards = args.shards or file_options.get('shards', 1)
+    if int(shards) < 1:
+        raise ValueError("Le nombre de plages (shards) doit être supérieur ou égal à 1")
+    seed = args.seed if args.seed is not None else file_options.get('seed')
+    commit_rows = args.commit_rows if args.commit_rows is not None else file_options.get('commit_rows', DEFAULT_COMMIT_ROWS)
+    commit_seconds = args.commit_seconds if args.commit_seconds is not None else file_options.get('commit_seconds')
+    commit_intervals = file_options.get('commit_intervals') or {}
+    clone_target = get_clone_target(args, config)
+    resume = args.resume or file_options.get('resume', False)
+    if clone_target and resume:
+        # La cible est recréée à chaque clonage : il n'y a rien à reprendre
+        raise ValueError("--resume n'est pas pris en charge en mode clone (la base cible est recréée "
+                         "entièrement à chaque exécution)")
+    driver = args.driver or file_options.get('driver', DEFAULT_DRIVER)
+    if driver not in DRIVERS:
+        raise ValueError(f"Pilote inconnu '{driver}' (valeurs possibles : {', '.join(DRIVERS)})")
+    bulk_session = args.bulk_session or file_options.get('bulk_session', False)
+    # En mode clone, la session allégée ne s'applique qu'à la base cible
+    session_host = clone_target if clone_target else (config.get('mysql') or {})
+    if bulk_session and session_host.get('production'):
+        raise ValueError("--bulk-session est refusé : l'hôte MySQL est marqué comme production "
+                         f"({'target' if clone_target else 'mysql'}.production)")
+    for interval in [{'rows': commit_rows, 'seconds': commit_seconds}] + list(commit_intervals.values()):
+        if interval.get('rows') is not None and int(interval['rows']) < 1:
+            raise ValueError("L'intervalle de commit (commit_rows) doit être supérieur ou égal à 1")
+        if interval.get('seconds') is not None and float(interval['seconds']) <= 0:
+            raise ValueError("L'intervalle de commit (commit_seconds) doit être strictement positif")
+    return {
+        'batch_size': int(batch_size),
+        'jobs': int(jobs),
+        'shards': int(shards),
+        'seed': seed,
+        'plan': args.plan,
+        'exact_count': args.exact_count or file_options.get('exact_count', False),
+        'resume': resume,
+        'checkpoint_file': args.checkpoint_file or file_options.get('checkpoint_file'),
+        'commit_rows': int(commit_rows) if commit_rows is not None else None,
+        'commit_seconds': float(commit_seconds) if commit_seconds is not None else None,
+        'commit_intervals': commit_intervals,
+        'engine': engine,
+        'table_engines': table_engines,
+        'keep_original': args.keep_original or file_options.get('keep_original', False),
+        'pool_size': int(pool_size),
+        'pools': file_options.get('pools') or {},
+        'bulk_session': bool(bulk_session),
+        'driver': driver,
+        'prepared': bool(args.prepared or file_options.get('prepared', False)),
+        'sql_pushdown': bool(args.sql_pushdown or file_options.get('sql_pushdown', False)),
+        'clone_target': clone_target,
+        'skip_empty_columns': args.skip_empty_columns or file_options.get('skip_empty_columns', False),
+        'metrics_json': args.metrics_json or file_options.get('metrics_json'),
+        'metrics_prometheus': args.metrics_prometheus or file_options.get('metrics_prometheus'),
+        'profile': bool(args.profile or args.profile_dump or file_options.get('profile', False)
+                        or file_options.get('profile_dump')),
+        'profile_dump': args.profile_dump or file_options.get('profile_dump'),
+        'pseudonymize': get_pseudonymize_options(file_options.get('pseudonymize')),
+    }
+
+def get_clone_target(args, config):
+    """Retourne la configuration de connexion de la base cible du mode clone (section `target`), ou None."""
+    if not getattr(args, 'clone', False):
+        return None
+    target = dict(config.get('target') or {})
+    for key in ('host', 'port', 'user', 'password', 'database'):
+        value = getattr(args, f'target_{key}', None)
+        if value is not None:
+            target[key] = value
+    missing = [key for key in ('host', 'user', 'database') if not target.get(key)]
+    if missing:
+        raise ValueError(f"Le mode clone nécessite une base cible (target.{', target.'.join(missing)} "
+                         "ou --target-host/--target-user/--target-database)")
+    if target.get('production'):
+        raise ValueError("Le mode clone est refusé : la base cible est marquée comme production (target.production)")
+    source = config.get('mysql') or {}
+    target.setdefault('port', 3306)
+    if (str(target['host']), int(target['port']), target['database']) == \
+            (str(source.get('host')), int(source.get('port') or 3306), source.get('database')):
+        raise ValueError("La base cible du mode clone doit être différente de la base source")
+    return target
+
+def get_pseudonymize_options(settings):
+    """Valide la section `pseudonymize` des options (secret via la config ou PROGICLONE_PSEUDONYMIZE_SECRET)."""
+    if not settings:
+        return None
+    if settings is True:
+        settings = {}
+    secret = settings.get('secret') or os.environ.get('PROGICLONE_PSEUDONYMIZE_SECRET')
+    if not secret:
+        raise ValueError("La pseudonymisation nécessite un secret (options.pseudonymize.secret "
+                         "ou variable d'environnement PROGICLONE_PSEUDONYMIZE_SECRET)")
+    return {
+        'secret': str(secret),
+        'columns': settings.get('columns') or DEFAULT_PSEUDONYMIZED_COLUMNS,
+        'cache_size': int(settings.get('cache_size', DEFAULT_PSEUDONYMIZE_CACHE_SIZE)),
+    }
+
+def parse_version(version):
+    """Convertit '1.10.0' en (1, 10, 0) pour comparer les versions numériquement."""
+    parts = []
+    for part in str(version).split('.'):
+        digits = ''.join(c for c in part if c.isdigit())
+        parts.append(int(digits) if digits else 0)
+    return tuple(parts)
+
+def update_check_disabled(args):
+    """Indique si la vérification des mises à jour est désactivée (option ou variable d'environnement)."""
+    env = os.environ.get('PROGICLONE_NO_UPDATE_CHECK', '').strip().lower()
+    return args.no_update_check or env not in ('', '0', 'false', 'no')
+
+class UpdateCheck:
+    """Vérification des mises à jour sur PyPI, dans un thread en arrière-plan.
+
+    Le résultat (y compris un échec) est gardé dans CACHE_DIR pendant `ttl` secondes : tant
+    qu'il est valide, aucun accès réseau n'a lieu. Le thread ne retarde jamais l'exécution,
+    la nouvelle version est signalée dès qu'elle est connue.
+    """
+    def __init__(self, cache_path=None, ttl=UPDATE_CHECK_TTL, timeout=5):
+        self.cache_path = cache_path or cache_file_path('update-check')
+        self.ttl = ttl
+        self.timeout = timeout
+        self.latest = None
+        self.reported = False
+
+    def start(self):
+        cached = self.read_cache()
+        if cached is not None:
+            self.latest = cached.get('latest')
+            return self
+        thread = threading.Thread(target=self.fetch, name='progiclone-update-check', daemon=True)
+        thread.start()
+        return self
+
+    def read_cache(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                cached = json.load(f)
+            if time.time() - float(cached['checked_at']) < self.ttl:
+                return cached
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def write_cache(self, latest):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, 'w') as f:
+                json.dump({'checked_at': time.time(), 'latest': latest}, f)
+        except OSError as e:
+            logging.debug(f"Impossible d'écrire le cache de mise à jour {self.cache_path} : {e}")
+
+    def fetch(self):
+        import requests
+        latest = None
+        try:
+            response = requests.get("https://pypi.org/pypi/progiclone/json", timeout=self.timeout)
+            if response.status_code != 200:
+                logging.debug(f"Erreur lors de la vérification des mises à jour : Code {response.status_code}")
+            else:
+                latest = response.json()["info"]["version"]
+        except requests.Timeout:
+            logging.debug("Timeout lors de la vérification des mises à jour")
+        except requests.RequestException as e:
+            logging.debug(f"Erreur réseau lors de la vérification des mises à jour : {str(e)}")
+        except (KeyError, ValueError) as e:
+            logging.debug(f"Erreur lors du parsing de la réponse PyPI : {str(e)}")
+        except Exception as e:
+            logging.debug(f"Erreur inattendue lors de la vérification des mises à jour : {str(e)}")
+        self.latest = latest
+        self.write_cache(latest)
+
+    def report(self):
+        """Signale une nouvelle version si elle est déjà connue, sans attendre le thread."""
+        latest = self.latest
+        if self.reported or not latest or parse_version(latest) <= parse_version(__version__):
             return
-            
-        latest = response.json()["info"]["version"]
-        if latest > __version__:
-            print(f"\n\033[93mNouvelle version {latest} disponible !")
-            print("Pour mettre à jour : pipx upgrade progiclone\033[0m\n")
-    except requests.Timeout:
-        logging.debug("Timeout lors de la vérification des mises à jour")
-    except requests.RequestException as e:
-        logging.debug(f"Erreur réseau lors de la vérification des mises à jour : {str(e)}")
-    except (KeyError, ValueError) as e:
-        logging.debug(f"Erreur lors du parsing de la réponse PyPI : {str(e)}")
-    except Exception as e:
-        logging.debug(f"Erreur inattendue lors de la vérification des mises à jour : {str(e)}")
+        self.reported = True
+        print(f"\n\033[93mNouvelle version {latest} disponible !", file=sys.stderr)
+        print("Pour mettre à jour : pipx upgrade progiclone\033[0m\n", file=sys.stderr)
 
 def is_autossh_installed():
     """Vérifie si autossh est installé."""
@@ -239,27 +537,166 @@ def get_mysql_info(dev_mode=False):
     port = input("Port MySQL (par défaut 3306): ") or "3306"
     return host, user, password, database, int(port)
 
-def ask_for_table(cnx, table_name, primary_keys, table_labels):
-    from tqdm import tqdm
+def format_duration(seconds):
+    """Formate une durée estimée pour l'affichage."""
+    if seconds is None:
+        return "inconnue"
+    if seconds < 60:
+        return f"{int(seconds)}s environ"
+    if seconds < 3600:
+        return f"{seconds / 60.0:.1f} min environ"
+    return f"{seconds / 3600.0:.1f} h environ"
+
+def fetch_row_counts(cnx, table_names, primary_keys, exact=False):
+    """Retourne le nombre de lignes de chaque table.
+
+    Par défaut, une seule requête sur information_schema.TABLES donne une estimation (rapide
+    mais approximative sous InnoDB) ; `exact` effectue un COUNT par table.
+    """
     from mysql.connector import Error
-    # Calcule le nombre de lignes et estime la durée
     cursor = cnx.cursor()
-    pk_field = primary_keys.get(table_name, "rowid")
+    row_counts = {}
+    if exact:
+        for table_name in table_names:
+            pk_field = primary_keys.get(table_name, "rowid")
+            try:
+                cursor.execute(f"SELECT COUNT({pk_field}) FROM {table_name}")
+                row_counts[table_name] = cursor.fetchone()[0]
+            except Error as err:
+                print(f"\033[91mErreur lors du comptage des lignes de {table_name}: {err}\033[0m")
+        return row_counts
+
+    if not table_names:
+        return row_counts
+    placeholders = ", ".join(["%s"] * len(table_names))
     try:
-        cursor.execute(f"SELECT COUNT({pk_field}) FROM {table_name}")
-        count_row = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES "
+            f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})",
+            list(table_names)
+        )
+        for table_name, table_rows in cursor.fetchall():
+            row_counts[table_name] = int(table_rows or 0)
     except Error as err:
-        print(f"\033[91mErreur lors du comptage des lignes de {table_name}: {err}\033[0m")
-        return False
+        print(f"\033[91mErreur lors de la lecture de information_schema.TABLES: {err}\033[0m")
+    return row_counts
 
-    estimated_seconds = count_row / 25.0
-    if estimated_seconds < 60:
-        estimated_time_str = f"{int(estimated_seconds)}s environ"
-    else:
-        estimated_minutes = estimated_seconds / 60.0
-        estimated_time_str = f"{estimated_minutes:.1f} min environ"
+def measure_round_trip(cnx, samples=3):
+    """Latence aller-retour (s) d'une requête minimale : la plus faible de `samples` mesures."""
+    cursor = cnx.cursor()
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def table_storage_engine(cnx, table_name):
+    """Moteur de stockage de la table (InnoDB, MyISAM...), ou None s'il est inconnu."""
+    cursor = cnx.cursor()
+    cursor.execute(
+        "SELECT ENGINE FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table_name,)
+    )
+    row = cursor.fetchone()
+    return str(row[0]) if row and row[0] else None
+
+def time_rolled_back_update(cnx, table_name, pk_field, fields_to_update, batch):
+    """Chronomètre l'UPDATE d'un lot dans une transaction aussitôt annulée (ROLLBACK)."""
+    params = []
+    for rid, data in batch:
+        params.append(rid)
+        params.extend(data)
+    cursor = cnx.cursor()
+    start = time.perf_counter()
+    try:
+        cursor.execute(build_batch_update_query(table_name, pk_field, fields_to_update, len(batch)), params)
+        return time.perf_counter() - start
+    finally:
+        cnx.rollback()
+
+def calibrate_table(cnx, table_name, pk_field, fields_dict, options, round_trip=0.0):
+    """Mesure le débit (lignes/s) sur un lot d'essai : lecture par clé, génération et écriture.
+
+    Retourne (débit, écriture mesurée). Sur une table InnoDB, l'UPDATE du lot est exécuté puis
+    annulé (ROLLBACK) : rien n'est conservé. Les tables non transactionnelles (MyISAM) et la
+    source du mode clone ne reçoivent aucune écriture ; l'écriture y est comptée pour une
+    latence aller-retour `round_trip` par lot.
+    """
+    from mysql.connector import Error
+    batch_size = options.get('batch_size', DEFAULT_BATCH_SIZE)
+    fields_to_update = list(fields_dict.keys())
+    try:
+        start_time = time.perf_counter()
+        read_fields = source_fields(fields_dict)
+        chunk = next(iter_pk_chunks(cnx, table_name, pk_field, batch_size, columns=read_fields), [])
+        if not chunk:
+            return None, False
+        row_ids, sources = split_source_rows(chunk, fields_to_update, read_fields)
+        batch = generate_rows([fields_dict[f] for f in fields_to_update], row_ids, sources)
+        elapsed = time.perf_counter() - start_time
+
+        writable = (not options.get('clone_target') and not getattr(cnx, 'autocommit', False)
+                    and (table_storage_engine(cnx, table_name) or '').lower() == 'innodb')
+        if writable:
+            elapsed += time_rolled_back_update(cnx, table_name, pk_field, fields_to_update, batch)
+        else:
+            elapsed += round_trip
+    except Error as err:
+        print(f"\033[91mErreur lors de l'étalonnage de {table_name}: {err}\033[0m")
+        return None, False
+    return (len(row_ids) / elapsed if elapsed > 0 else None), writable
+
+def plan_tables(cnx, tables_to_anonymize, primary_keys, options, calibrate=True):
+    """Phase de planification : nombre de lignes, débit étalonné et durée estimée par table.
 
-    print(f"\n⌛ Estimation du temps pour {table_name}: ~{estimated_time_str}")
+    Sans `calibrate`, seul le nombre de lignes est relevé (débit et durée inconnus).
+    """
+    from mysql.connector import Error
+    table_names = [table_name for table_name, _ in tables_to_anonymize]
+    row_counts = fetch_row_counts(cnx, table_names, primary_keys, options.get('exact_count', False))
+    shards = options.get('shards', 1)
+    round_trip = 0.0
+    if calibrate:
+        try:
+            round_trip = measure_round_trip(cnx)
+        except Error as err:
+            print(f"\033[91mErreur lors de la mesure de la latence: {err}\033[0m")
+    plan = {}
+    for table_name, fields_dict in tables_to_anonymize:
+        pk_field = primary_keys.get(table_name, "rowid")
+        rows = row_counts.get(table_name, 0)
+        rate, write_measured = (calibrate_table(cnx, table_name, pk_field, fields_dict, options, round_trip)
+                                if calibrate else (None, False))
+        eta = rows / (rate * shards) if rate else (0 if not rows else None)
+        plan[table_name] = {'rows': rows, 'rate': rate, 'eta': eta, 'write_measured': write_measured}
+    return plan
+
+def print_plan(plan, options):
+    """Affiche le plan d'anonymisation et la durée totale estimée."""
+    print("\n\033[96m=== Plan d'anonymisation ===\033[0m")
+    label = "lignes" if options.get('exact_count') else "lignes (approx.)"
+    modelled = False
+    for table_name, table_plan in plan.items():
+        rate = f"{table_plan['rate']:.0f} lignes/s" if table_plan['rate'] else "débit inconnu"
+        if table_plan['rate'] and not table_plan['write_measured']:
+            rate += "*"
+            modelled = True
+        print(f"  {table_name:<28} {table_plan['rows']:>10} {label}  {rate:>19}  ⌛ {format_duration(table_plan['eta'])}")
+    if modelled:
+        print("  * écriture non mesurée (table non InnoDB ou mode clone) : une latence aller-retour par lot "
+              "est comptée à la place")
+    etas = [p['eta'] for p in plan.values() if p['eta'] is not None]
+    if etas:
+        jobs = options.get('jobs', 1)
+        total = max(max(etas), sum(etas) / jobs)
+        print(f"\n⌛ Durée totale estimée : {format_duration(total)}"
+              + (f" ({jobs} tables en parallèle)" if jobs > 1 else ""))
+
+def ask_for_table(table_name, table_labels, table_plan=None):
+    if table_plan and table_plan['eta'] is not None:
+        print(f"\n⌛ Estimation du temps pour {table_name}: ~{format_duration(table_plan['eta'])}")
 
     label = table_labels.get(table_name, "")
     print()
@@ -276,273 +713,1416 @@ def ask_for_table(cnx, table_name, primary_keys, table_labels):
         else:
             print("Veuillez répondre par Y ou N.")
 
-def anonymize_table(cnx, table_name, fields_dict, primary_keys, table_labels):
-    from tqdm import tqdm
+def cache_file_path(prefix, *parts):
+    """Construit un chemin de fichier dans CACHE_DIR à partir d'éléments (hôte, base...)."""
+    name = "-".join([prefix] + ["".join(c if c.isalnum() else "_" for c in str(p)) for p in parts])
+    return os.path.join(CACHE_DIR, name + ".json")
+
+class Checkpoint:
+    """Point de reprise local : dernier ID validé (commit) par table ou plage, et paramètres du run."""
+    def __init__(self, path, params, tables=None):
+        self.path = path
+        self.params = params
+        self.tables = tables or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path, params, resume=False):
+        """Charge le point de reprise existant si `resume`, sinon en démarre un nouveau."""
+        if resume:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get('params') != params:
+                    raise ValueError(f"Le point de reprise {path} a été créé avec d'autres paramètres "
+                                     f"({data.get('params')}), reprise impossible")
+                print(f"\033[93mReprise de l'exécution précédente depuis {path}\033[0m")
+                return cls(path, params, data.get('tables'))
+            print(f"\033[93mAucun point de reprise trouvé ({path}), démarrage d'une nouvelle exécution.\033[0m")
+        checkpoint = cls(path, params)
+        checkpoint.save()
+        return checkpoint
+
+    def last_pk(self, key):
+        return self.tables.get(key, {}).get('last_pk')
+
+    def is_done(self, key):
+        return self.tables.get(key, {}).get('done', False)
+
+    def update(self, key, last_pk):
+        """Enregistre le dernier ID validé pour `key` (à appeler après le commit)."""
+        with self._lock:
+            self.tables[key] = {'last_pk': last_pk, 'done': False}
+            self.save()
+
+    def mark_done(self, key):
+        with self._lock:
+            self.tables.setdefault(key, {})['done'] = True
+            self.save()
+
+    def save(self):
+        """Écrit le point de reprise de manière atomique."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'params': self.params, 'tables': self.tables}, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def write_run_reports(options):
+    """Écrit les mesures et affiche le profil demandés, y compris après une exécution en échec."""
+    profiler = options.get('profiler')
+    if profiler:
+        print("\n\033[96mProfil de l'exécution (--profile)\033[0m")
+        for line in profiler.report():
+            print(line)
+        if options.get('profile_dump'):
+            try:
+                profiler.dump_cprofile(options['profile_dump'])
+                print(f"Profil cProfile écrit dans {options['profile_dump']} (python -m pstats {options['profile_dump']})")
+            except OSError as e:
+                print(f"\033[93mImpossible d'écrire le profil cProfile : {e}\033[0m")
+    if not (options.get('metrics_json') or options.get('metrics_prometheus')):
+        return
+    try:
+        options['metrics'].write(options.get('metrics_json'), options.get('metrics_prometheus'))
+    except OSError as e:
+        print(f"\033[93mImpossible d'écrire les mesures : {e}\033[0m")
+
+def build_values_derived(pk_field, fields_to_update, batch_len):
+    """Construit une table dérivée (UNION ALL) de `batch_len` lignes (id, valeurs...) passées en paramètres."""
+    placeholders = ", ".join(["%s"] * (len(fields_to_update) + 1))
+    first_row = "SELECT " + ", ".join([f"%s AS {pk_field}"] + [f"%s AS {f}" for f in fields_to_update])
+    other_rows = [f"SELECT {placeholders}"] * (batch_len - 1)
+    return " UNION ALL ".join([first_row] + other_rows)
+
+def build_batch_update_query(table_name, pk_field, fields_to_update, batch_len):
+    """Construit un UPDATE multi-lignes via une jointure sur une table dérivée (UNION ALL)."""
+    derived = build_values_derived(pk_field, fields_to_update, batch_len)
+    set_clause = ", ".join([f"t.{f}=v.{f}" for f in fields_to_update])
+    return (f"UPDATE {table_name} AS t JOIN ({derived}) AS v "
+            f"ON t.{pk_field}=v.{pk_field} SET {set_clause}")
+
+class StatementCache:
+    """Requêtes d'écriture d'une connexion, construites une seule fois par table et jeu de colonnes.
+
+    Avec `prepared`, chaque requête est préparée côté serveur à sa première exécution, puis
+    réexécutée en ne transmettant que ses paramètres (protocole binaire). Les requêtes de plus
+    de MAX_PREPARED_PARAMS paramètres restent en protocole texte.
+    """
+    def __init__(self, cnx, prepared=False):
+        self.cnx = cnx
+        self.prepared = prepared
+        self.queries = {}
+        self.cursors = {}
+        self.text_cursor = None
+
+    def query(self, key, build):
+        query = self.queries.get(key)
+        if query is None:
+            query = self.queries[key] = build()
+        return query
+
+    def execute(self, key, build, params):
+        """Exécute la requête `key` (construite par `build()` à la première utilisation)."""
+        query = self.query(key, build)
+        if self.prepared and len(params) <= MAX_PREPARED_PARAMS:
+            cursor = self.cursors.get(key)
+            if cursor is None:
+                # Un curseur par requête : chacune n'est préparée qu'une fois
+                cursor = self.cursors[key] = self.cnx.cursor(prepared=True)
+        else:
+            if self.text_cursor is None:
+                self.text_cursor = self.cnx.cursor()
+            cursor = self.text_cursor
+        cursor.execute(query, params)
+        return cursor
+
+    def close(self):
+        """Libère les requêtes préparées côté serveur."""
+        for cursor in self.cursors.values():
+            try:
+                cursor.close()
+            except Exception as e:
+                logging.debug(f"Fermeture d'une requête préparée impossible : {e}")
+        self.cursors.clear()
+
+def is_connection_error(err):
+    """Vrai si l'erreur MySQL tient à la connexion (perdue, délai dépassé...) plutôt qu'aux valeurs d'une ligne.
+
+    Rejouer le lot ligne par ligne ne servirait à rien : l'erreur est propagée pour que la table
+    soit reprise avec --resume à partir du dernier ID validé.
+    """
+    from mysql.connector import InterfaceError, OperationalError
+    return isinstance(err, (InterfaceError, OperationalError))
+
+def apply_update_batch(statements, table_name, pk_field, fields_to_update, batch):
+    """Applique un lot de lignes [(id, valeurs), ...] et retourne la liste des IDs en échec.
+
+    Le lot est envoyé en une seule requête. En cas d'erreur, il est rejoué ligne par ligne
+    afin d'identifier précisément les IDs fautifs.
+    """
+    from mysql.connector import Error
+    columns = tuple(fields_to_update)
+    params = []
+    for rid, data in batch:
+        params.append(rid)
+        params.extend(data)
+    try:
+        statements.execute(('update', table_name, columns, len(batch)),
+                           lambda: build_batch_update_query(table_name, pk_field, fields_to_update, len(batch)),
+                           params)
+        return []
+    except Error as err:
+        if is_connection_error(err):
+            raise
+        print(f"\033[91mErreur lors de la mise à jour groupée de {table_name} "
+              f"(IDs {batch[0][0]} à {batch[-1][0]}): {err}\033[0m")
+
+    set_clause = ", ".join([f"{f}=%s" for f in fields_to_update])
+    build_row_query = lambda: f"UPDATE {table_name} SET {set_clause} WHERE {pk_field}=%s"
+    failed_ids = []
+    for rid, data in batch:
+        try:
+            statements.execute(('update-row', table_name, columns), build_row_query, list(data) + [rid])
+        except Error as err:
+            if is_connection_error(err):
+                raise
+            print(f"\033[91mErreur lors de la mise à jour de {table_name} ID {rid}: {err}\033[0m")
+            failed_ids.append(rid)
+    return failed_ids
+
+def shadow_table_name(table_name, suffix='new'):
+    return f"{table_name}_progiclone_{suffix}"
+
+def apply_shadow_batch(statements, table_name, pk_field, fields_to_update, batch, columns):
+    """Insère un lot de lignes anonymisées dans la table fantôme et retourne les IDs en échec.
+
+    Les colonnes anonymisées viennent du lot, les autres sont recopiées côté serveur depuis la
+    table d'origine. En cas d'erreur, le lot est rejoué ligne par ligne.
+    """
     from mysql.connector import Error
+    shadow = shadow_table_name(table_name)
+    column_list = ", ".join(columns)
+    key_columns = tuple(fields_to_update)
+
+    def build_batch_query():
+        derived = build_values_derived(pk_field, fields_to_update, len(batch))
+        select = ", ".join([f"v.{c}" if c in fields_to_update else f"t.{c}" for c in columns])
+        return (f"INSERT INTO {shadow} ({column_list}) SELECT {select} FROM {table_name} AS t "
+                f"JOIN ({derived}) AS v ON t.{pk_field}=v.{pk_field}")
+
+    params = []
+    for rid, data in batch:
+        params.append(rid)
+        params.extend(data)
+    try:
+        statements.execute(('shadow', table_name, key_columns, len(batch)), build_batch_query, params)
+        return []
+    except Error as err:
+        if is_connection_error(err):
+            raise
+        print(f"\033[91mErreur lors de l'insertion groupée dans {shadow} "
+              f"(IDs {batch[0][0]} à {batch[-1][0]}): {err}\033[0m")
+
+    positions = [fields_to_update.index(c) for c in columns if c in fields_to_update]
+    row_select = ", ".join(["%s" if c in fields_to_update else c for c in columns])
+    build_row_query = lambda: (f"INSERT INTO {shadow} ({column_list}) SELECT {row_select} "
+                               f"FROM {table_name} WHERE {pk_field}=%s")
+    failed_ids = []
+    for rid, data in batch:
+        try:
+            statements.execute(('shadow-row', table_name, key_columns), build_row_query,
+                               [data[i] for i in positions] + [rid])
+        except Error as err:
+            if is_connection_error(err):
+                raise
+            print(f"\033[91mErreur lors de l'insertion de {table_name} ID {rid} dans {shadow}: {err}\033[0m")
+            failed_ids.append(rid)
+    return failed_ids
+
+def shadow_last_pk(cnx, table_name, pk_field, pk_range=None):
+    """Dernier ID déjà copié dans la table fantôme (dans la plage), point de reprise du moteur 'shadow'.
+
+    Les lignes sont insérées par ordre croissant de clé et validées dans l'ordre : le plus grand
+    ID présent est donc le dernier ID validé, même si le point de reprise n'a pas pu être écrit.
+    """
+    where = ""
+    params = []
+    if pk_range:
+        where = f" WHERE {pk_field} BETWEEN %s AND %s"
+        params = list(pk_range)
     cursor = cnx.cursor()
-    print(f"\n\033[96mAnonymisation de la table {table_name}...\033[0m")
-    pk_field = primary_keys.get(table_name, "rowid")
+    cursor.execute(f"SELECT MAX({pk_field}) FROM {shadow_table_name(table_name)}{where}", params)
+    return cursor.fetchone()[0]
+
+def prepare_shadow_table(cnx, table_name, options):
+    """Crée `{table}_progiclone_new` (CREATE TABLE ... LIKE) et retourne les colonnes à copier.
+
+    Retourne None si la table ne peut pas être échangée sans risque (clés étrangères entrantes
+    ou sortantes, déclencheurs) : elle est alors traitée par le moteur 'update'. En reprise
+    (--resume), une table fantôme existante est conservée et complétée.
+    """
+    from mysql.connector import Error
+    cursor = cnx.cursor()
+    shadow = shadow_table_name(table_name)
+    try:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = DATABASE() "
+            "AND REFERENCED_TABLE_NAME IS NOT NULL AND (TABLE_NAME = %s OR REFERENCED_TABLE_NAME = %s)",
+            (table_name, table_name)
+        )
+        foreign_keys = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.TRIGGERS "
+            "WHERE EVENT_OBJECT_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s",
+            (table_name,)
+        )
+        triggers = cursor.fetchone()[0]
+        if foreign_keys or triggers:
+            print(f"\033[93m{table_name}: {foreign_keys} clé(s) étrangère(s) et {triggers} déclencheur(s), "
+                  f"échange de table impossible, moteur 'update' utilisé.\033[0m")
+            return None
+
+        cursor.execute(
+            "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+            "AND TABLE_NAME = %s AND EXTRA NOT LIKE '%%GENERATED%%' ORDER BY ORDINAL_POSITION",
+            (table_name,)
+        )
+        columns = [row[0] for row in cursor.fetchall()]
 
+        cursor.execute("SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() "
+                       "AND TABLE_NAME = %s", (shadow,))
+        exists = cursor.fetchone()[0]
+        if exists and options.get('resume'):
+            print(f"\033[93mReprise de la copie dans {shadow}.\033[0m")
+        else:
+            cursor.execute(f"DROP TABLE IF EXISTS {shadow}")
+            cursor.execute(f"CREATE TABLE {shadow} LIKE {table_name}")
+        return columns
+    except Error as err:
+        print(f"\033[91mImpossible de préparer {shadow}: {err}, moteur 'update' utilisé.\033[0m")
+        return None
+
+def swap_shadow_table(cnx, table_name, keep_original=False):
+    """Échange atomiquement la table d'origine et la table fantôme (RENAME TABLE).
+
+    La table d'origine est conservée sous `{table}_progiclone_old` si `keep_original`, sinon supprimée.
+    """
+    from mysql.connector import Error
+    cursor = cnx.cursor()
+    shadow = shadow_table_name(table_name)
+    old = shadow_table_name(table_name, 'old')
+    cnx.commit()
+    try:
+        # CREATE TABLE ... LIKE ne reprend pas le compteur AUTO_INCREMENT
+        cursor.execute("SELECT AUTO_INCREMENT FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() "
+                       "AND TABLE_NAME = %s", (table_name,))
+        row = cursor.fetchone()
+        if row and row[0]:
+            cursor.execute(f"ALTER TABLE {shadow} AUTO_INCREMENT = {int(row[0])}")
+        cursor.execute(f"RENAME TABLE {table_name} TO {old}, {shadow} TO {table_name}")
+    except Error as err:
+        print(f"\033[91mÉchange de {table_name} et {shadow} impossible : {err}\033[0m")
+        return False
+    if keep_original:
+        print(f"\033[93mTable d'origine conservée sous le nom {old}.\033[0m")
+    else:
+        try:
+            cursor.execute(f"DROP TABLE {old}")
+        except Error as err:
+            print(f"\033[91mSuppression de {old} impossible : {err}\033[0m")
+    return True
+
+def drop_shadow_table(cnx, table_name):
+    from mysql.connector import Error
+    try:
+        cnx.cursor().execute(f"DROP TABLE IF EXISTS {shadow_table_name(table_name)}")
+    except Error as err:
+        print(f"\033[91mSuppression de {shadow_table_name(table_name)} impossible : {err}\033[0m")
+
+def table_engine(options, table_name):
+    """Moteur d'écriture de la table : réglage `table_engines` de la table, sinon le moteur du run."""
+    return (options.get('table_engines') or {}).get(table_name) or options.get('engine', DEFAULT_ENGINE)
+
+def escape_tsv_value(value):
+    """Échappe une valeur pour le format de LOAD DATA (antislash, NUL, tabulations, retours)."""
+    if value is None:
+        return "\\N"
+    return (str(value)
+            .replace("\\", "\\\\")
+            .replace("\0", "\\0")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r"))
+
+def anonymize_table_infile(cnx, table_name, pk_field, fields_dict, chunks, batch_size, progress, committer):
+    """Anonymise une table via un fichier TSV local chargé dans une table de transit.
+
+    Les valeurs générées sont écrites en flux dans un fichier temporaire, chargées avec
+    LOAD DATA LOCAL INFILE dans une table temporaire indexée sur la clé primaire, puis
+    appliquées par UPDATE ... JOIN sur des plages de clés de la taille de l'intervalle de
+    commit, chacune validée par `committer`. Retourne False si le serveur refuse le chargement
+    (local_infile désactivé par exemple), afin de basculer sur le moteur par lots.
+    """
+    import tempfile
+    from mysql.connector import Error
+    cursor = cnx.cursor()
+    fields_to_update = list(fields_dict.keys())
+    row_plan = RowPlan([fields_dict[f] for f in fields_to_update])
+    read_fields = source_fields(fields_dict)
+    stage_table = f"{table_name}_progiclone_stage"
+    columns = ", ".join([pk_field] + fields_to_update)
+    stats = committer.stats or TableMetrics(table_name)
+
+    written = 0
+    # Bornes (dernier ID, nombre de lignes) des plages appliquées puis validées une à une
+    range_size = committer.rows or FETCH_SIZE
+    ranges = []
+    range_rows = 0
+    tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.tsv', delete=False)
     try:
-        cursor.execute(f"SELECT {pk_field} FROM {table_name}")
+        with tmp:
+            for chunk in chunks:
+                row_ids, sources = split_source_rows(chunk, fields_to_update, read_fields)
+                for batch_ids, batch_sources in iter_batches(row_ids, sources, batch_size):
+                    start = time.perf_counter()
+                    rows = row_plan.build(batch_ids, batch_sources)
+                    tmp.writelines(
+                        "\t".join([escape_tsv_value(rid)] + [escape_tsv_value(v) for v in data]) + "\n"
+                        for rid, data in rows
+                    )
+                    stats.add('generation', time.perf_counter() - start)
+                    written += len(rows)
+                    range_rows += len(rows)
+                    progress.update(len(rows))
+                    if range_rows >= range_size:
+                        ranges.append((rows[-1][0], range_rows))
+                        range_rows = 0
+            if range_rows:
+                ranges.append((rows[-1][0], range_rows))
+
+        start = time.perf_counter()
+        try:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {stage_table}")
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {stage_table} (PRIMARY KEY ({pk_field})) "
+                f"SELECT {columns} FROM {table_name} LIMIT 0"
+            )
+            print(f"\033[93mChargement des données fictives de {table_name} (LOAD DATA LOCAL INFILE)...\033[0m")
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {stage_table} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns})",
+                (tmp.name,)
+            )
+        except Error as err:
+            print(f"\033[91mChargement en masse impossible pour {table_name}: {err}\033[0m")
+            progress.update(-written)
+            return False
+        stats.add('database', time.perf_counter() - start)
+
+        set_clause = ", ".join([f"t.{f}=s.{f}" for f in fields_to_update])
+        updated = 0
+        applied = 0
+        low = None
+        try:
+            for high, count in ranges:
+                lower = f"s.{pk_field} > %s AND " if low is not None else ""
+                params = ([low] if low is not None else []) + [high]
+                start = time.perf_counter()
+                cursor.execute(
+                    f"UPDATE {table_name} AS t JOIN {stage_table} AS s USING ({pk_field}) SET {set_clause} "
+                    f"WHERE {lower}s.{pk_field} <= %s",
+                    params
+                )
+                updated += cursor.rowcount
+                stats.add('database', time.perf_counter() - start, rows=count)
+                committer.add(count, high)
+                applied += count
+                low = high
+            committer.commit()
+            print(f"\033[92m{updated} enregistrement(s) de {table_name} mis à jour.\033[0m")
+        except Error as err:
+            print(f"\033[91mErreur lors de l'application des données de transit sur {table_name}: {err}\033[0m")
+            progress.update(-(written - applied))
+            return False
+        return True
+    finally:
+        os.unlink(tmp.name)
+        try:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {stage_table}")
+        except Error:
+            pass
+
+def iter_pk_chunks(cnx, table_name, pk_field, chunk_size, pk_range=None, after=None, columns=()):
+    """Parcourt les clés primaires par pagination sur la clé (keyset), paquet par paquet.
+
+    Chaque requête ne rapporte que `chunk_size` IDs (WHERE pk > dernier ORDER BY pk LIMIT n) :
+    la mémoire utilisée ne dépend pas de la taille de la table. `after` reprend le parcours
+    après un ID déjà traité. Si `columns` est fourni, chaque élément est un tuple
+    (id, valeurs d'origine de ces colonnes...).
+    """
+    cursor = cnx.cursor()
+    low, high = pk_range or (None, None)
+    last_id = after
+    while True:
+        conditions = []
+        params = []
+        if last_id is not None:
+            conditions.append(f"{pk_field} > %s")
+            params.append(last_id)
+        elif low is not None:
+            conditions.append(f"{pk_field} >= %s")
+            params.append(low)
+        if high is not None:
+            conditions.append(f"{pk_field} <= %s")
+            params.append(high)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        select = ", ".join([pk_field] + list(columns))
+        cursor.execute(f"SELECT {select} FROM {table_name}{where} ORDER BY {pk_field} LIMIT %s",
+                       params + [chunk_size])
         rows = cursor.fetchall()
-        row_ids = [r[0] for r in rows]
+        if not rows:
+            return
+        yield rows if columns else [r[0] for r in rows]
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+def count_done_rows(cnx, table_name, pk_field, pk_range, after):
+    """Compte les lignes déjà traitées lors d'une exécution précédente (jusqu'à l'ID `after`)."""
+    conditions = [f"{pk_field} <= %s"]
+    params = [after]
+    if pk_range:
+        conditions.append(f"{pk_field} >= %s")
+        params.append(pk_range[0])
+    cursor = cnx.cursor()
+    cursor.execute(f"SELECT COUNT({pk_field}) FROM {table_name} WHERE {' AND '.join(conditions)}", params)
+    return cursor.fetchone()[0]
+
+def anonymize_rows(cnx, table_name, pk_field, fields_dict, options, progress, pk_range=None, checkpoint_key=None,
+                   stats=None):
+    """Anonymise les lignes de la table (ou de la plage `pk_range`) et retourne les IDs en échec.
+
+    La transaction est validée (commit) à chaque intervalle de commit de la table (voir
+    `commit_interval`) et le dernier ID validé est enregistré dans le point de reprise, s'il y en a un.
+    Une erreur MySQL (connexion perdue...) est propagée : les lots déjà validés restent acquis.
+    """
+    batch_size = options.get('batch_size', DEFAULT_BATCH_SIZE)
+    checkpoint = options.get('checkpoint')
+    checkpoint_key = checkpoint_key or table_name
+    fields_to_update = list(fields_dict.keys())
+    row_plan = RowPlan([fields_dict[f] for f in fields_to_update])
+    read_fields = source_fields(fields_dict)
+    commit_rows, commit_seconds = commit_interval(options, table_name)
+    stats = stats or TableMetrics(table_name)
+    committer = ChunkedCommitter(cnx, commit_rows, commit_seconds, checkpoint, checkpoint_key, stats)
+    statements = StatementCache(cnx, options.get('prepared'))
+    failed_ids = []
+    try:
+        after = checkpoint.last_pk(checkpoint_key) if checkpoint else None
+        if options.get('engine') == 'shadow':
+            after = shadow_last_pk(cnx, table_name, pk_field, pk_range)
+        if after is not None:
+            progress.update(count_done_rows(cnx, table_name, pk_field, pk_range, after))
+
+        if options.get('engine') == 'infile':
+            chunks = timed_iter(iter_pk_chunks(cnx, table_name, pk_field, FETCH_SIZE, pk_range, after, read_fields),
+                                stats)
+            if anonymize_table_infile(cnx, table_name, pk_field, fields_dict, chunks, batch_size, progress,
+                                      committer):
+                return failed_ids
+            print(f"\033[93mBascule sur le moteur par lots pour {table_name}.\033[0m")
+            if committer.committed_pk is not None:
+                after = committer.committed_pk
+
+        chunks = iter_pk_chunks(cnx, table_name, pk_field, FETCH_SIZE, pk_range, after, read_fields)
+        for chunk in timed_iter(chunks, stats):
+            row_ids, sources = split_source_rows(chunk, fields_to_update, read_fields)
+            for batch_ids, batch_sources in iter_batches(row_ids, sources, batch_size):
+                start = time.perf_counter()
+                batch = row_plan.build(batch_ids, batch_sources)
+                generated = time.perf_counter()
+                stats.add('generation', generated - start)
+                if options.get('engine') == 'shadow':
+                    failed_ids.extend(apply_shadow_batch(statements, table_name, pk_field, fields_to_update, batch,
+                                                         options['shadow_columns']))
+                else:
+                    failed_ids.extend(apply_update_batch(statements, table_name, pk_field, fields_to_update, batch))
+                stats.add('database', time.perf_counter() - generated, rows=len(batch))
+                progress.update(len(batch))
+                committer.add(len(batch), batch_ids[-1])
+        committer.commit()
+    finally:
+        statements.close()
+    return failed_ids
+
+def split_pk_ranges(min_id, max_id, shards):
+    """Découpe l'intervalle [min_id, max_id] en `shards` plages contiguës."""
+    step = -(-(max_id - min_id + 1) // shards)
+    return [(low, min(low + step - 1, max_id)) for low in range(min_id, max_id + 1, step)]
+
+def anonymize_shard(connection_config, table_name, pk_field, fields_dict, pk_range, options, progress, seed,
+                    stats=None):
+    """Anonymise une plage de clés primaires sur sa propre connexion et sa propre instance Faker."""
+    fake.use_new_instance(seed)
+    checkpoint = options.get('checkpoint')
+    checkpoint_key = f"{table_name}:{pk_range[0]}-{pk_range[1]}"
+    cnx = open_worker_connection(connection_config, options)
+    try:
+        if checkpoint and checkpoint.is_done(checkpoint_key):
+            progress.update(count_done_rows(cnx, table_name, pk_field, pk_range, pk_range[1]))
+            return []
+        failed_ids = anonymize_rows(cnx, table_name, pk_field, fields_dict, options, progress, pk_range,
+                                    checkpoint_key, stats)
+        cnx.commit()
+        if checkpoint:
+            checkpoint.mark_done(checkpoint_key)
+        return failed_ids
+    finally:
+        cnx.close()
+
+def anonymize_table_sharded(cnx, table_name, pk_field, fields_dict, options, connection_config, position=None,
+                            stats=None, row_count=None):
+    """Répartit une table en plages de clés primaires traitées en parallèle, avec une barre unique.
+
+    Les bornes des plages viennent de MIN/MAX sur la clé primaire (lues dans l'index) ; le total
+    de la barre est le nombre de lignes `row_count` relevé par plan_tables, sans COUNT.
+    Retourne les IDs en échec, ou False si la table n'a pas pu être traitée entièrement.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from tqdm import tqdm
+    from mysql.connector import Error
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"SELECT MIN({pk_field}), MAX({pk_field}) FROM {table_name}")
+        min_id, max_id = cursor.fetchone()
     except Error as err:
-        print(f"\033[91mErreur lors de la sélection des IDs de {table_name}: {err}\033[0m")
-        return
+        print(f"\033[91mErreur lors du calcul des plages d'IDs de {table_name}: {err}\033[0m")
+        return False
 
-    if not row_ids:
+    if min_id is None:
         print(f"Aucune donnée à anonymiser dans {table_name}.")
-        return
+        return []
+
+    pk_ranges = split_pk_ranges(min_id, max_id, options['shards'])
+    base_seed = options.get('seed')
+    if base_seed is None:
+        base_seed = random.SystemRandom().randrange(2 ** 32)
+    logging.debug(f"{table_name}: {len(pk_ranges)} plage(s) {pk_ranges}, graine de base {base_seed}")
+
+    failed_ids = []
+    failed_ranges = 0
+    with tqdm(total=row_count or None, desc=f"Traitement {table_name}", unit="enregistrement",
+              position=position) as progress:
+        if stats is not None:
+            stats.progress = progress
+        with ThreadPoolExecutor(max_workers=len(pk_ranges)) as executor:
+            futures = [
+                executor.submit(anonymize_shard, connection_config, table_name, pk_field, fields_dict,
+                                pk_range, options, progress, base_seed + index, stats)
+                for index, pk_range in enumerate(pk_ranges)
+            ]
+            for future in futures:
+                try:
+                    failed_ids.extend(future.result())
+                except Exception as e:
+                    failed_ranges += 1
+                    print(f"\033[91mErreur lors du traitement d'une plage de {table_name}: {e}\033[0m")
+    return False if failed_ranges else failed_ids
 
-    fields_to_update = list(fields_dict.keys())
-    set_clause = ", ".join([f"{f}=%s" for f in fields_to_update])
+def anonymize_table(cnx, table_name, fields_dict, primary_keys, table_labels, options=None, position=None,
+                    connection_config=None, row_count=None):
+    """Anonymise une table ; `row_count` (relevé par plan_tables) évite un COUNT supplémentaire.
+
+    Retourne True si la table est entièrement anonymisée (et marquée comme terminée dans le point
+    de reprise), False sinon.
+    """
+    try:
+        return anonymize_table_fields(cnx, table_name, fields_dict, primary_keys, options, position,
+                                      connection_config, row_count)
+    finally:
+        # L'unicité des champs `unique` vaut par table : leur mémoire ne grossit pas au fil du run
+        reset_unique_fields(fields_dict)
+
+def anonymize_table_fields(cnx, table_name, fields_dict, primary_keys, options, position, connection_config,
+                           row_count):
+    """Corps d'anonymize_table."""
+    from tqdm import tqdm
+    from mysql.connector import Error
+    options = options or {}
+    cursor = cnx.cursor()
+    print(f"\n\033[96mAnonymisation de la table {table_name}...\033[0m")
+    pk_field = primary_keys.get(table_name, "rowid")
+    stats = table_metrics(options, table_name)
+    started = time.perf_counter()
+
+    engine = table_engine(options, table_name)
+    if engine == 'shadow':
+        columns = prepare_shadow_table(cnx, table_name, options)
+        if columns:
+            options = dict(options, engine='shadow', shadow_columns=columns)
+        else:
+            options = dict(options, engine=DEFAULT_ENGINE)
+    elif engine != options.get('engine'):
+        options = dict(options, engine=engine)
+    stats.engine = options.get('engine', DEFAULT_ENGINE)
+    fields_dict, pushdown = split_sql_pushdown(cnx, table_name, pk_field, fields_dict, options)
+    if pushdown:
+        logging.info(f"{table_name}: {', '.join(pushdown)} calculé(s) côté serveur")
+
+    if pushdown and not fields_dict and options.get('engine') != 'shadow':
+        # Toutes les colonnes sont calculées en SQL : aucun lot ne transite par le client
+        failed_ids = []
+    elif options.get('shards', 1) > 1 and connection_config:
+        failed_ids = anonymize_table_sharded(cnx, table_name, pk_field, fields_dict, options,
+                                             connection_config, position, stats, row_count)
+        if failed_ids is False:
+            # Les plages validées restent dans le point de reprise (et la copie du moteur 'shadow')
+            return False
+    else:
+        count_row = row_count
+        if count_row is None:
+            try:
+                cursor.execute(f"SELECT COUNT({pk_field}) FROM {table_name}")
+                count_row = cursor.fetchone()[0]
+            except Error as err:
+                print(f"\033[91mErreur lors du comptage des lignes de {table_name}: {err}\033[0m")
+                return False
+
+        # Une estimation (information_schema.TABLES) peut valoir 0 sur une table non vide
+        if not count_row and (row_count is None or options.get('exact_count')):
+            print(f"Aucune donnée à anonymiser dans {table_name}.")
+            if options.get('engine') == 'shadow':
+                drop_shadow_table(cnx, table_name)
+            if options.get('checkpoint'):
+                options['checkpoint'].mark_done(table_name)
+            return True
+
+        with tqdm(total=count_row or None, desc=f"Traitement {table_name}", unit="enregistrement",
+                  position=position) as progress:
+            stats.progress = progress
+            try:
+                failed_ids = anonymize_rows(cnx, table_name, pk_field, fields_dict, options, progress, stats=stats)
+            except (Error, UniqueValueError) as err:
+                # Les lots validés restent dans le point de reprise (et la copie du moteur 'shadow')
+                print(f"\033[91mErreur lors de l'anonymisation de {table_name}: {err}\033[0m")
+                return False
 
-    for rid in tqdm(row_ids, desc=f"Traitement {table_name}", unit="enregistrement"):
-        data = [fields_dict[f]() for f in fields_to_update]
-        query = f"UPDATE {table_name} SET {set_clause} WHERE {pk_field}=%s"
+    stats.elapsed += time.perf_counter() - started
+    stats.failed += len(failed_ids)
+    if failed_ids:
+        print(f"\033[93m{len(failed_ids)} enregistrement(s) de {table_name} non anonymisé(s).\033[0m")
+    logging.info(f"{table_name}: {stats.chunks} transaction(s) validée(s), "
+                 f"{stats.rows} enregistrement(s), {stats.commit_time:.2f} s de commit")
+
+    if pushdown and not (failed_ids and options.get('engine') == 'shadow'):
+        # Moteur 'shadow' : l'UPDATE porte sur la copie, avant l'échange des tables
+        target = shadow_table_name(table_name) if options.get('engine') == 'shadow' else table_name
+        pushdown_started = time.perf_counter()
         try:
-            cursor.execute(query, data + [rid])
+            rows = apply_sql_pushdown(cnx, target, pk_field, pushdown, options, stats, source_table=table_name)
         except Error as err:
-            print(f"\033[91mErreur lors de la mise à jour de {table_name} ID {rid}: {err}\033[0m")
-            continue
+            print(f"\033[91mErreur lors du calcul côté serveur de {table_name} ({', '.join(pushdown)}): {err}\033[0m")
+            cnx.rollback()
+            if options.get('engine') == 'shadow':
+                drop_shadow_table(cnx, table_name)
+            return False
+        if not fields_dict and options.get('engine') != 'shadow':
+            # Aucun passage ligne à ligne n'a compté ces enregistrements
+            stats.add('database', 0, rows=rows)
+        stats.elapsed += time.perf_counter() - pushdown_started
+
+    if options.get('engine') == 'shadow':
+        if failed_ids:
+            # Des lignes manquent dans la copie : la table d'origine reste en place
+            print(f"\033[91mCopie de {table_name} incomplète, table d'origine conservée.\033[0m")
+            drop_shadow_table(cnx, table_name)
+            return False
+        if not swap_shadow_table(cnx, table_name, options.get('keep_original')):
+            return False
 
     try:
         cnx.commit()
-        print(f"\033[92mTable {table_name} anonymisée avec succès ! ✅\033[0m")
     except Error as err:
         print(f"\033[91mErreur lors du commit des modifications pour {table_name}: {err}\033[0m")
+        return False
+    if failed_ids:
+        # Des lignes gardent leurs données d'origine : la table n'est pas marquée comme terminée
+        return False
+    if options.get('checkpoint'):
+        options['checkpoint'].mark_done(table_name)
+    print(f"\033[92mTable {table_name} anonymisée avec succès ! ✅\033[0m")
+    return True
+
+def profile_tables(tables, options):
+    """Générateurs chronométrés par le profileur du run (--profile), ou les tables telles quelles."""
+    profiler = options.get('profiler')
+    return profiler.wrap_tables(tables) if profiler else tables
+
+def open_worker_connection(connection_config, options):
+    """Ouvre une connexion supplémentaire (pool, plage) avec les réglages de session du run."""
+    import mysql.connector
+    cnx = profile_connection(mysql.connector.connect(**connection_config), options)
+    if options.get('bulk_session'):
+        _, failures = apply_bulk_session(cnx)
+        for variable, error in failures:
+            logging.debug(f"Réglage de session non appliqué : {variable} ({error})")
+    return cnx
+
+def open_connection_pool(cnx, connection_config, size, options=None):
+    """Retourne une file de `size` connexions : la connexion existante plus des connexions supplémentaires."""
+    import queue
+    connections = queue.Queue()
+    connections.put(cnx)
+    for _ in range(size - 1):
+        connections.put(open_worker_connection(connection_config, options or {}))
+    return connections
+
+def close_connection_pool(connections, keep):
+    """Ferme les connexions du pool, sauf la connexion principale `keep`."""
+    while not connections.empty():
+        pooled_cnx = connections.get()
+        if pooled_cnx is not keep and pooled_cnx.is_connected():
+            pooled_cnx.close()
+
+def run_table_worker(connections, table_name, fields_dict, primary_keys, table_labels, options, position,
+                     connection_config, row_count=None):
+    """Anonymise une table sur une connexion empruntée au pool ; retourne True si elle l'est entièrement."""
+    cnx = connections.get()
+    try:
+        return anonymize_table(cnx, table_name, fields_dict, primary_keys, table_labels, options,
+                               position=position, connection_config=connection_config, row_count=row_count)
+    except Exception as e:
+        print(f"\033[91mErreur lors de l'anonymisation de {table_name}: {e}\033[0m")
+        return False
+    finally:
+        connections.put(cnx)
+
+def anonymize_data_parallel(cnx, primary_keys, table_labels, tables_to_anonymize, options, connection_config, plan):
+    """Anonymise les tables en parallèle sur un pool de connexions.
+
+    Les confirmations sont demandées avant de lancer les workers, puis les tables sont
+    planifiées de la plus volumineuse à la plus petite. Retourne les tables en échec.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    selected = []
+    for (table_name, fields_dict) in tables_to_anonymize:
+        if ask_for_table(table_name, table_labels, plan.get(table_name)):
+            selected.append((table_name, fields_dict))
+        else:
+            print(f"\033[93mTable {table_name} ignorée. ❌\033[0m")
+
+    if not selected:
+        return []
+
+    selected.sort(key=lambda item: plan.get(item[0], {}).get('rows', 0), reverse=True)
+    jobs = min(options['jobs'], len(selected))
+    print(f"\n\033[96mAnonymisation de {len(selected)} table(s) avec {jobs} connexion(s) en parallèle...\033[0m")
+
+    connections = open_connection_pool(cnx, connection_config, jobs, options)
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                table_name: executor.submit(run_table_worker, connections, table_name, fields_dict,
+                                            primary_keys, table_labels, options, position, connection_config,
+                                            plan.get(table_name, {}).get('rows'))
+                for position, (table_name, fields_dict) in enumerate(selected)
+            }
+    finally:
+        close_connection_pool(connections, keep=cnx)
+    return [table_name for table_name, future in futures.items() if not future.result()]
+
+def anonymize_data(cnx, primary_keys, table_labels, tables_to_anonymize, options=None, connection_config=None):
+    """Anonymise les tables confirmées, une à une ou en parallèle (--jobs) ; retourne les tables en échec."""
+    options = options or {}
+    checkpoint = options.get('checkpoint')
+    if checkpoint:
+        pending = []
+        for (table_name, fields_dict) in tables_to_anonymize:
+            if checkpoint.is_done(table_name):
+                print(f"\033[92mTable {table_name} déjà anonymisée lors de l'exécution précédente. ✅\033[0m")
+            else:
+                pending.append((table_name, fields_dict))
+        tables_to_anonymize = pending
+
+    # Le débit n'est étalonné qu'avec --plan : ici, seuls les nombres de lignes sont relevés
+    plan = plan_tables(cnx, tables_to_anonymize, primary_keys, options, calibrate=False)
 
-def anonymize_data(cnx, primary_keys, table_labels, tables_to_anonymize):
+    if options.get('jobs', 1) > 1 and connection_config:
+        return anonymize_data_parallel(cnx, primary_keys, table_labels, tables_to_anonymize, options,
+                                       connection_config, plan)
+
+    failed_tables = []
     for (table_name, fields_dict) in tables_to_anonymize:
-        if ask_for_table(cnx, table_name, primary_keys, table_labels):
-            anonymize_table(cnx, table_name, fields_dict, primary_keys, table_labels)
+        if ask_for_table(table_name, table_labels, plan.get(table_name)):
+            if not anonymize_table(cnx, table_name, fields_dict, primary_keys, table_labels, options,
+                                   connection_config=connection_config,
+                                   row_count=plan.get(table_name, {}).get('rows')):
+                failed_tables.append(table_name)
         else:
             print(f"\033[93mTable {table_name} ignorée. ❌\033[0m")
+    return failed_tables
+
+def get_schema_version(cnx):
+    """Retourne la version du schéma Dolibarr (dernière mise à jour ou installation), ou None."""
+    from mysql.connector import Error
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(
+            "SELECT value FROM llx_const WHERE name IN ('MAIN_VERSION_LAST_UPGRADE', 'MAIN_VERSION_LAST_INSTALL') "
+            "ORDER BY name DESC LIMIT 1"
+        )
+        row = cursor.fetchone()
+    except Error as err:
+        logging.debug(f"Version du schéma Dolibarr introuvable : {err}")
+        return None
+    return str(row[0]) if row else None
+
+def fetch_table_schemas(cnx, table_names):
+    """Lit les colonnes de toutes les tables en une requête sur information_schema.COLUMNS.
+
+    Retourne {table: {colonne: {'data_type': ..., 'max_length': ...}}} ; une table absente
+    de la base est associée à un dictionnaire vide.
+    """
+    cursor = cnx.cursor()
+    placeholders = ", ".join(["%s"] * len(table_names))
+    cursor.execute(
+        "SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH FROM information_schema.COLUMNS "
+        f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})",
+        list(table_names)
+    )
+    schemas = {table_name: {} for table_name in table_names}
+    for table_name, column_name, data_type, max_length in cursor.fetchall():
+        schemas[table_name][column_name] = {
+            'data_type': str(data_type).lower(),
+            'max_length': int(max_length) if max_length is not None else None,
+        }
+    return schemas
+
+def load_table_schemas(cnx, table_names, cache_path):
+    """Retourne le schéma des tables, depuis le cache disque s'il correspond à la version Dolibarr."""
+    version = get_schema_version(cnx)
+    if version and cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get('version') == version and all(t in cached.get('tables', {}) for t in table_names):
+                logging.debug(f"Schéma lu depuis le cache {cache_path} (version {version})")
+                return cached['tables']
+        except (OSError, ValueError) as e:
+            logging.debug(f"Cache de schéma illisible ({cache_path}) : {e}")
+
+    schemas = fetch_table_schemas(cnx, table_names)
+    if version and cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump({'version': version, 'tables': schemas}, f)
+        except OSError as e:
+            logging.debug(f"Impossible d'écrire le cache de schéma {cache_path} : {e}")
+    return schemas
+
+def find_empty_columns(cnx, table_name, columns, schema):
+    """Retourne les colonnes entièrement NULL ou vides de la table (un seul parcours)."""
+    from mysql.connector import Error
+    checks = []
+    for column in columns:
+        if schema[column]['max_length'] is not None:
+            checks.append(f"MAX({column} IS NOT NULL AND {column} <> '')")
+        else:
+            checks.append(f"MAX({column} IS NOT NULL)")
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"SELECT {', '.join(checks)} FROM {table_name}")
+        row = cursor.fetchone()
+    except Error as err:
+        print(f"\033[91mErreur lors de la recherche des colonnes vides de {table_name}: {err}\033[0m")
+        return []
+    return [column for column, filled in zip(columns, row) if not filled]
+
+def apply_table_schemas(cnx, tables, options):
+    """Adapte les tables au schéma réel de la base.
+
+    Les colonnes absentes (anciennes versions de Dolibarr) sont retirées, les valeurs sont
+    tronquées à la longueur des colonnes VARCHAR/CHAR et, avec `skip_empty_columns`, les
+    colonnes entièrement NULL ou vides ne sont pas réécrites.
+    """
+    table_names = [table_name for table_name, _ in tables]
+    schemas = load_table_schemas(cnx, table_names, options.get('schema_cache'))
+    configured_tables = []
+    for table_name, fields_dict in tables:
+        schema = schemas.get(table_name) or {}
+        if not schema:
+            print(f"\033[93mTable {table_name} absente de la base, ignorée.\033[0m")
+            continue
+
+        missing = [field for field in fields_dict if field not in schema]
+        if missing:
+            print(f"\033[93m{table_name}: colonnes absentes ignorées : {', '.join(missing)}\033[0m")
+        present = [field for field in fields_dict if field in schema]
+        empty = find_empty_columns(cnx, table_name, present, schema) if options.get('skip_empty_columns') and present else []
+        if empty:
+            print(f"\033[93m{table_name}: colonnes vides non réécrites : {', '.join(empty)}\033[0m")
+
+        new_fields = {}
+        for field in present:
+            if field in empty:
+                continue
+            gen = fields_dict[field]
+            column = schema[field]
+            if column['data_type'] in ('char', 'varchar') and column['max_length']:
+                gen = TruncatedField(gen, column['max_length'])
+            new_fields[field] = gen
+        if not new_fields:
+            print(f"\033[93mAucune colonne à anonymiser dans {table_name}, table ignorée.\033[0m")
+            continue
+        configured_tables.append((table_name, new_fields))
+    return configured_tables
+
+def select_tables(args, config, options):
+    """Retourne les tables demandées (--tables ou clé 'tables' de la config), réservoirs configurés."""
+    requested_tables = args.tables or config.get('tables')
+    if requested_tables:
+        tables_to_process = [(t, d) for t, d in tables_to_anonymize if t in requested_tables]
+    else:
+        tables_to_process = tables_to_anonymize
+    tables_to_process = apply_pseudonymization(tables_to_process, options)
+    return apply_pool_options(tables_to_process, options)
+
+def run_clone(cnx, args, config, options, connection_config):
+    """Mode clone : recopie la base source vers la base cible en anonymisant à la volée.
+
+    Toutes les tables prises en charge sont anonymisées, sans confirmation table par table :
+    leurs données d'origine ne sont jamais écrites sur la cible. --tables limite les tables copiées.
+    """
+    from mysql.connector import Error
+    from progiclone.clone import clone_database
+    tables = apply_pool_options(apply_pseudonymization(tables_to_anonymize, options), options)
+    try:
+        tables = apply_table_schemas(cnx, tables, options)
+    except Error as err:
+        print(f"\033[91mErreur lors de la lecture du schéma (information_schema.COLUMNS): {err}\033[0m")
+    tables = profile_tables(tables, options)
+
+    target = options['clone_target']
+    target_config = {
+        'host': target['host'],
+        'port': int(target.get('port', 3306)),
+        'user': target['user'],
+        'password': target.get('password', ''),
+        'database': target['database'],
+        'connection_timeout': 10,
+        'use_pure': driver_use_pure(options.get('driver', DEFAULT_DRIVER)),
+    }
+    print(f"\n\033[93mClonage de {connection_config.get('database')} vers "
+          f"{target_config['database']}@{target_config['host']}...\033[0m 🚀")
+    results = clone_database(cnx, connection_config, target_config, tables, options,
+                             requested=args.tables or config.get('tables'))
+    print(f"\033[92m{len(results)} table(s) et {sum(results.values())} enregistrement(s) copiés.\033[0m")
+
+def run_anonymization(cnx, args, config, options, connection_config):
+    """Sélectionne les tables demandées puis lance la planification seule (--plan) ou l'anonymisation.
+
+    Retourne les tables en échec.
+    """
+    from mysql.connector import Error
+    if options.get('clone_target') and not options.get('plan'):
+        run_clone(cnx, args, config, options, connection_config)
+        return []
+
+    tables_to_process = select_tables(args, config, options)
+    try:
+        tables_to_process = apply_table_schemas(cnx, tables_to_process, options)
+    except Error as err:
+        print(f"\033[91mErreur lors de la lecture du schéma (information_schema.COLUMNS): {err}\033[0m")
+    tables_to_process = profile_tables(tables_to_process, options)
+
+    if options.get('plan'):
+        print("\n\033[93mPlanification (aucune donnée ne sera modifiée)...\033[0m")
+        print_plan(plan_tables(cnx, tables_to_process, primary_keys, options), options)
+        return []
 
-# Définition des champs anonymisés
-from faker import Faker
+    print("\n\033[93mDébut de l'anonymisation...\033[0m 🚀")
+    with bulk_session(cnx, options):
+        return anonymize_data(cnx, primary_keys, table_labels, tables_to_process, options, connection_config)
 
-fake = Faker('fr_FR')
+def unique_columns(cnx, table_name):
+    """Retourne les colonnes de la table couvertes par un index unique (clé primaire comprise).
 
-def short_import_key():
-    return fake.uuid4().replace('-', '')[:14]
+    Retourne None si information_schema ne peut pas être lu.
+    """
+    from mysql.connector import Error
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(
+            "SELECT DISTINCT COLUMN_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 0",
+            (table_name,)
+        )
+        return {column for (column,) in cursor.fetchall()}
+    except Error as err:
+        print(f"\033[91mErreur lors de la lecture des index uniques de {table_name}: {err}\033[0m")
+        return None
+
+def split_sql_pushdown(cnx, table_name, pk_field, fields_dict, options):
+    """Sépare les champs calculables en SQL (--sql-pushdown) des champs générés côté client.
+
+    Les colonnes d'un index unique (ref de facture, track_id...) restent générées côté client :
+    un doublon ferait échouer l'UPDATE après la validation des autres colonnes.
+    Retourne (champs générés en Python, {colonne: (expression, paramètres)}).
+    """
+    if not options.get('sql_pushdown'):
+        return fields_dict, {}
+    unique = unique_columns(cnx, table_name)
+    if unique is None:
+        return fields_dict, {}
+    client_fields, pushdown = {}, {}
+    for field, gen in fields_dict.items():
+        expression = None if field in unique else sql_pushdown_expression(gen, pk_field)
+        if expression is None:
+            client_fields[field] = gen
+        else:
+            pushdown[field] = expression
+    return client_fields, pushdown
+
+def apply_sql_pushdown(cnx, table_name, pk_field, pushdown, options, stats, source_table=None):
+    """Réécrit les colonnes calculables en SQL par des UPDATE successifs sur des plages de clés primaires.
+
+    Chaque plage compte au plus `commit_rows` lignes ; les transactions sont validées à l'intervalle
+    de commit de la table et la dernière clé validée est enregistrée dans le point de reprise.
+    `source_table` est la table d'origine quand l'UPDATE porte sur la copie du moteur 'shadow'.
+    Retourne le nombre de lignes réécrites.
+    """
+    source_table = source_table or table_name
+    checkpoint = options.get('checkpoint')
+    checkpoint_key = f"{source_table}:sql"
+    if checkpoint and checkpoint.is_done(checkpoint_key):
+        return 0
+    commit_rows, commit_seconds = commit_interval(options, source_table)
+    chunk_size = commit_rows or DEFAULT_COMMIT_ROWS
+    committer = ChunkedCommitter(cnx, commit_rows, commit_seconds, checkpoint, checkpoint_key, stats,
+                                 sql_pushdown=True)
+    set_clause = ", ".join(f"{column} = {sql}" for column, (sql, _) in pushdown.items())
+    params = [param for _, params in pushdown.values() for param in params]
+    cursor = cnx.cursor()
+    after = checkpoint.last_pk(checkpoint_key) if checkpoint else None
+    total = 0
+    while True:
+        start = time.perf_counter()
+        where, bounds = (f"WHERE {pk_field} > %s ", [after]) if after is not None else ("", [])
+        cursor.execute(
+            f"SELECT MAX({pk_field}), COUNT(*) FROM (SELECT {pk_field} FROM {table_name} {where}"
+            f"ORDER BY {pk_field} LIMIT %s) AS chunk",
+            bounds + [chunk_size]
+        )
+        high, count = cursor.fetchone()
+        stats.add('read', time.perf_counter() - start)
+        if not count:
+            break
+        start = time.perf_counter()
+        lower = f"{pk_field} > %s AND " if after is not None else ""
+        cursor.execute(f"UPDATE {table_name} SET {set_clause} WHERE {lower}{pk_field} <= %s",
+                       params + bounds + [high])
+        stats.add('database', time.perf_counter() - start)
+        total += count
+        committer.add(count, high)
+        after = high
+    committer.commit()
+    if checkpoint:
+        checkpoint.mark_done(checkpoint_key)
+    return total
+
+def split_source_rows(rows, fields_to_update, read_fields):
+    """Sépare un paquet lu par iter_pk_chunks en (IDs, {index du champ: valeurs d'origine})."""
+    if not read_fields:
+        return rows, None
+    row_ids = [row[0] for row in rows]
+    sources = {fields_to_update.index(field): [row[i + 1] for row in rows] for i, field in enumerate(read_fields)}
+    return row_ids, sources
+
+def iter_batches(row_ids, sources, batch_size):
+    """Découpe un paquet d'IDs (et ses valeurs d'origine) en lots de `batch_size` lignes."""
+    for start in range(0, len(row_ids), batch_size):
+        end = start + batch_size
+        yield row_ids[start:end], ({i: values[start:end] for i, values in sources.items()} if sources else None)
+
+def apply_pseudonymization(tables, options):
+    """Remplace les générateurs des colonnes à pseudonymiser par des champs cohérents.
+
+    Les colonnes partageant un même réservoir (e-mails, noms...) partagent aussi la même
+    correspondance, ce qui préserve les jointures et recherches entre tables.
+    """
+    settings = options.get('pseudonymize')
+    if not settings:
+        return tables
+    columns = set(settings['columns'])
+    pseudonymizer = Pseudonymizer(settings['secret'], settings['cache_size'])
+    configured_tables = []
+    for table_name, fields_dict in tables:
+        new_fields = {}
+        for field, gen in fields_dict.items():
+            if f"{table_name}.{field}" in columns:
+                if isinstance(gen, ValuePool):
+                    kind = gen.name or f"{table_name}.{field}"
+                    gen = PseudonymizedField(kind, gen.generator, pseudonymizer)
+                else:
+                    gen = PseudonymizedField(f"{table_name}.{field}", gen, pseudonymizer)
+            new_fields[field] = gen
+        configured_tables.append((table_name, new_fields))
+    return configured_tables
+
+def apply_pool_options(tables, options):
+    """Applique la configuration des réservoirs (taille globale et réglages par champ).
+
+    `options['pool_size']` fixe la taille par défaut (0 désactive les réservoirs) et
+    `options['pools']` accepte des réglages par champ, par exemple
+    {'llx_societe.nom': {'size': 5000}, 'llx_user.email': {'unique': True}}.
+    Un champ `unique` est généré à chaque ligne, sans réservoir, et ne répète aucune valeur.
+    """
+    pool_size = options.get('pool_size', DEFAULT_POOL_SIZE)
+    field_options = options.get('pools') or {}
+    resized = {}
+    configured_tables = []
+    for table_name, fields_dict in tables:
+        new_fields = {}
+        for field, gen in fields_dict.items():
+            settings = field_options.get(f"{table_name}.{field}") or {}
+            if settings.get('unique') and not isinstance(gen, PseudonymizedField):
+                gen = UniqueField(gen.generator if isinstance(gen, ValuePool) else gen)
+            elif isinstance(gen, ValuePool):
+                size = settings.get('size', pool_size)
+                if size == 0:
+                    gen = gen.generator
+                elif 'size' in settings:
+                    gen = gen.resized(size)
+                elif size != gen.size:
+                    # Conserver le partage du réservoir entre les champs d'un même fournisseur
+                    if id(gen) not in resized:
+                        resized[id(gen)] = gen.resized(size)
+                    gen = resized[id(gen)]
+            new_fields[field] = gen
+        configured_tables.append((table_name, new_fields))
+    return configured_tables
 
 societe_fields = {
-    "nom": lambda: fake.company(),
-    "name_alias": lambda: fake.company(),
-    "ref_ext": lambda: fake.uuid4(),
-    "ref_int": lambda: fake.uuid4(),
-    "address": lambda: fake.address().replace('\n', ', '),
-    "zip": lambda: fake.postcode(),
-    "town": lambda: fake.city(),
-    "phone": lambda: fake.phone_number(),
-    "fax": lambda: fake.phone_number(),
-    "url": lambda: fake.url(),
-    "email": lambda: fake.email(),
-    "socialnetworks": lambda: fake.text(max_nb_chars=200),
-    "siren": lambda: fake.bothify(text='#########'),
-    "siret": lambda: fake.bothify(text='##############'),
-    "ape": lambda: fake.bothify(text='????##'),
-    "idprof4": lambda: fake.bothify(text='IDP4####'),
-    "idprof5": lambda: fake.bothify(text='IDP5####'),
-    "idprof6": lambda: fake.bothify(text='IDP6####'),
-    "tva_intra": lambda: fake.bothify(text='FR##????####'),
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "model_pdf": lambda: fake.word(),
-    "last_main_doc": lambda: fake.word(),
-    "supplier_account": lambda: fake.bothify(text='SUPACC####'),
-    "fk_prospectlevel": lambda: fake.bothify(text='PROSP##'),
-    "location_incoterms": lambda: fake.city(),
-    "deposit_percent": lambda: fake.numerify(text='##'),
-    "canvas": lambda: fake.word(),
+    "nom": company_pool,
+    "name_alias": company_pool,
+    "ref_ext": FakerField('uuid4'),
+    "ref_int": FakerField('uuid4'),
+    "address": address_pool,
+    "zip": postcode_pool,
+    "town": city_pool,
+    "phone": phone_pool,
+    "fax": phone_pool,
+    "url": url_pool,
+    "email": email_pool,
+    "socialnetworks": short_text_pool,
+    "siren": FakerField('bothify', text='#########'),
+    "siret": FakerField('bothify', text='##############'),
+    "ape": FakerField('bothify', text='????##'),
+    "idprof4": FakerField('bothify', text='IDP4####'),
+    "idprof5": FakerField('bothify', text='IDP5####'),
+    "idprof6": FakerField('bothify', text='IDP6####'),
+    "tva_intra": FakerField('bothify', text='FR##????####'),
+    "note_private": text_pool,
+    "note_public": text_pool,
+    "model_pdf": word_pool,
+    "last_main_doc": word_pool,
+    "supplier_account": FakerField('bothify', text='SUPACC####'),
+    "fk_prospectlevel": FakerField('bothify', text='PROSP##'),
+    "location_incoterms": city_pool,
+    "deposit_percent": FakerField('numerify', text='##'),
+    "canvas": word_pool,
     "import_key": short_import_key,
-    "webservices_url": lambda: fake.url(),
-    "webservices_key": lambda: fake.uuid4(),
-    "barcode": lambda: fake.ean13(),
-    "accountancy_code_sell": lambda: fake.bothify(text='ACS####'),
-    "accountancy_code_buy": lambda: fake.bothify(text='ACB####'),
-    "multicurrency_code": lambda: "EUR",
-    "default_lang": lambda: "fr_FR",
-    "logo": lambda: fake.word(),
-    "logo_squarred": lambda: fake.word()
+    "webservices_url": url_pool,
+    "webservices_key": FakerField('uuid4'),
+    "barcode": FakerField('ean13'),
+    "accountancy_code_sell": FakerField('bothify', text='ACS####'),
+    "accountancy_code_buy": FakerField('bothify', text='ACB####'),
+    "multicurrency_code": ConstantField("EUR"),
+    "default_lang": ConstantField("fr_FR"),
+    "logo": word_pool,
+    "logo_squarred": word_pool
 }
 
 socpeople_fields = {
-    "ref_ext": lambda: fake.uuid4(),
-    "civility": lambda: fake.random_element(elements=["M.", "Mme", "Dr", "Me"]),
-    "lastname": lambda: fake.last_name(),
-    "firstname": lambda: fake.first_name(),
-    "address": lambda: fake.address().replace('\n', ', '),
-    "zip": lambda: fake.postcode(),
-    "town": lambda: fake.city(),
-    "poste": lambda: fake.job(),
-    "phone": lambda: fake.phone_number(),
-    "phone_perso": lambda: fake.phone_number(),
-    "phone_mobile": lambda: fake.phone_number(),
-    "fax": lambda: fake.phone_number(),
-    "email": lambda: fake.email(),
-    "socialnetworks": lambda: fake.text(max_nb_chars=200),
-    "photo": lambda: fake.word(),
-    "fk_prospectlevel": lambda: fake.bothify(text='PROSP##'),
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "default_lang": lambda: "fr_FR",
-    "canvas": lambda: fake.word(),
+    "ref_ext": FakerField('uuid4'),
+    "civility": FakerField('random_element', elements=["M.", "Mme", "Dr", "Me"]),
+    "lastname": last_name_pool,
+    "firstname": first_name_pool,
+    "address": address_pool,
+    "zip": postcode_pool,
+    "town": city_pool,
+    "poste": job_pool,
+    "phone": phone_pool,
+    "phone_perso": phone_pool,
+    "phone_mobile": phone_pool,
+    "fax": phone_pool,
+    "email": email_pool,
+    "socialnetworks": short_text_pool,
+    "photo": word_pool,
+    "fk_prospectlevel": FakerField('bothify', text='PROSP##'),
+    "note_private": text_pool,
+    "note_public": text_pool,
+    "default_lang": ConstantField("fr_FR"),
+    "canvas": word_pool,
     "import_key": short_import_key
 }
 
 user_fields = {
-    "ref_employee": lambda: fake.bothify(text='EMP####'),
-    "ref_ext": lambda: fake.uuid4(),
-    "gender": lambda: fake.random_element(elements=["male", "female", "other"]),
-    "civility": lambda: fake.random_element(elements=["M.", "Mme", "Dr", "Me"]),
-    "lastname": lambda: fake.last_name(),
-    "firstname": lambda: fake.first_name(),
-    "address": lambda: fake.address().replace('\n', ', '),
-    "zip": lambda: fake.postcode(),
-    "town": lambda: fake.city(),
-    "job": lambda: fake.job(),
-    "office_phone": lambda: fake.phone_number(),
-    "office_fax": lambda: fake.phone_number(),
-    "user_mobile": lambda: fake.phone_number(),
-    "personal_mobile": lambda: fake.phone_number(),
-    "email": lambda: fake.email(),
-    "personal_email": lambda: fake.email(),
-    "socialnetworks": lambda: fake.text(max_nb_chars=200),
-    "signature": lambda: fake.text(max_nb_chars=200),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "model_pdf": lambda: fake.word(),
-    "ldap_sid": lambda: fake.uuid4(),
-    "openid": lambda: fake.url(),
-    "photo": lambda: fake.word(),
-    "lang": lambda: "fr_FR",
+    "ref_employee": FakerField('bothify', text='EMP####'),
+    "ref_ext": FakerField('uuid4'),
+    "gender": FakerField('random_element', elements=["male", "female", "other"]),
+    "civility": FakerField('random_element', elements=["M.", "Mme", "Dr", "Me"]),
+    "lastname": last_name_pool,
+    "firstname": first_name_pool,
+    "address": address_pool,
+    "zip": postcode_pool,
+    "town": city_pool,
+    "job": job_pool,
+    "office_phone": phone_pool,
+    "office_fax": phone_pool,
+    "user_mobile": phone_pool,
+    "personal_mobile": phone_pool,
+    "email": email_pool,
+    "personal_email": email_pool,
+    "socialnetworks": short_text_pool,
+    "signature": short_text_pool,
+    "note_public": text_pool,
+    "note_private": text_pool,
+    "model_pdf": word_pool,
+    "ldap_sid": FakerField('uuid4'),
+    "openid": url_pool,
+    "photo": word_pool,
+    "lang": ConstantField("fr_FR"),
     "color": lambda: fake.hex_color().lstrip('#'),
-    "barcode": lambda: fake.ean13(),
-    "accountancy_code": lambda: fake.bothify(text='ACCT####'),
+    "barcode": FakerField('ean13'),
+    "accountancy_code": FakerField('bothify', text='ACCT####'),
     "import_key": short_import_key,
-    "iplastlogin": lambda: fake.ipv4(),
-    "ippreviouslogin": lambda: fake.ipv4(),
-    "twofactor_qrcode": lambda: fake.text(max_nb_chars=200),
-    "twofactor_params": lambda: fake.text(max_nb_chars=200),
-    "national_registration_number": lambda: fake.bothify(text='##########'),
-    "birth_place": lambda: fake.city(),
-    "email_oauth2": lambda: fake.email(),
-    "last_main_doc": lambda: fake.word()
+    "iplastlogin": FakerField('ipv4'),
+    "ippreviouslogin": FakerField('ipv4'),
+    "twofactor_qrcode": short_text_pool,
+    "twofactor_params": short_text_pool,
+    "national_registration_number": FakerField('bothify', text='##########'),
+    "birth_place": city_pool,
+    "email_oauth2": email_pool,
+    "last_main_doc": word_pool
 }
 
 facture_fields = {
-    "ref": lambda: "FAKEFAC-" + fake.uuid4().replace('-', '')[:10],
-    "ref_ext": lambda: fake.uuid4(),
-    "ref_int": lambda: fake.uuid4(),
-    "ref_client": lambda: fake.bothify(text='FAKECLIENT-####'),
-    "increment": lambda: fake.bothify(text='INC####'),
-    "close_code": lambda: fake.bothify(text='CLOSE####'),
-    "close_note": lambda: fake.sentence(nb_words=5),
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "model_pdf": lambda: fake.word(),
-    "location_incoterms": lambda: fake.city(),
+    "ref": HexField("FAKEFAC-", 10),
+    "ref_ext": FakerField('uuid4'),
+    "ref_int": FakerField('uuid4'),
+    "ref_client": FakerField('bothify', text='FAKECLIENT-####'),
+    "increment": FakerField('bothify', text='INC####'),
+    "close_code": FakerField('bothify', text='CLOSE####'),
+    "close_note": ValuePool(lambda: fake.sentence(nb_words=5)),
+    "note_private": text_pool,
+    "note_public": text_pool,
+    "model_pdf": word_pool,
+    "location_incoterms": city_pool,
     "import_key": short_import_key,
-    "extraparams": lambda: fake.bothify(text='PARAMS####'),
-    "multicurrency_code": lambda: "EUR",
-    "last_main_doc": lambda: fake.word(),
-    "module_source": lambda: fake.word(),
-    "pos_source": lambda: fake.word()
+    "extraparams": FakerField('bothify', text='PARAMS####'),
+    "multicurrency_code": ConstantField("EUR"),
+    "last_main_doc": word_pool,
+    "module_source": word_pool,
+    "pos_source": word_pool
 }
 
 propal_fields = {
-    "ref": lambda: "FAKEPROP-" + fake.uuid4().replace('-', '')[:10],
-    "ref_client": lambda: fake.bothify(text='FAKECLIENT-####'),
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "model_pdf": lambda: fake.word()
+    "ref": HexField("FAKEPROP-", 10),
+    "ref_client": FakerField('bothify', text='FAKECLIENT-####'),
+    "note_private": text_pool,
+    "note_public": text_pool,
+    "model_pdf": word_pool
 }
 
 commande_fields = {
-    "ref": lambda: "FAKECMD-" + fake.uuid4().replace('-', '')[:10],
-    "ref_client": lambda: fake.bothify(text='FAKECLIENT-####'),
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "model_pdf": lambda: fake.word()
+    "ref": HexField("FAKECMD-", 10),
+    "ref_client": FakerField('bothify', text='FAKECLIENT-####'),
+    "note_private": text_pool,
+    "note_public": text_pool,
+    "model_pdf": word_pool
 }
 
 contrat_fields = {
-    "ref": lambda: "FAKECTR-" + fake.uuid4().replace('-', '')[:10],
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500)
+    "ref": HexField("FAKECTR-", 10),
+    "note_private": text_pool,
+    "note_public": text_pool
 }
 
 facture_fourn_fields = {
-    "ref": lambda: "FAKEFACF-" + fake.uuid4().replace('-', '')[:10],
-    "ref_supplier": lambda: "FAKEFOURN-" + fake.uuid4().replace('-', '')[:5],
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "model_pdf": lambda: fake.word()
+    "ref": HexField("FAKEFACF-", 10),
+    "ref_supplier": HexField("FAKEFOURN-", 5),
+    "note_private": text_pool,
+    "note_public": text_pool,
+    "model_pdf": word_pool
 }
 
 commande_fourn_fields = {
-    "ref": lambda: "FAKECMDF-" + fake.uuid4().replace('-', '')[:10],
-    "ref_supplier": lambda: "FAKEFOURN-" + fake.uuid4().replace('-', '')[:5],
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "model_pdf": lambda: fake.word()
+    "ref": HexField("FAKECMDF-", 10),
+    "ref_supplier": HexField("FAKEFOURN-", 5),
+    "note_private": text_pool,
+    "note_public": text_pool,
+    "model_pdf": word_pool
 }
 
 projet_fields = {
-    "ref": lambda: "FAKEPROJ-" + fake.uuid4().replace('-', '')[:10],
-    "title": lambda: fake.sentence(nb_words=3),
-    "description": lambda: fake.text(max_nb_chars=500),
-    "note_private": lambda: fake.text(max_nb_chars=500),
-    "note_public": lambda: fake.text(max_nb_chars=500),
-    "model_pdf": lambda: fake.word(),
-    "last_main_doc": lambda: fake.word(),
+    "ref": HexField("FAKEPROJ-", 10),
+    "title": ValuePool(lambda: fake.sentence(nb_words=3)),
+    "description": text_pool,
+    "note_private": text_pool,
+    "note_public": text_pool,
+    "model_pdf": word_pool,
+    "last_main_doc": word_pool,
     "import_key": short_import_key,
-    "email_msgid": lambda: "<" + fake.uuid4().replace('-', '') + "@example.com>",
-    "ip": lambda: fake.ipv4(),
-    "location": lambda: fake.city(),
-    "extraparams": lambda: fake.bothify(text='PARAMS####')
+    "email_msgid": HexField("<", 32, "@example.com>"),
+    "ip": FakerField('ipv4'),
+    "location": city_pool,
+    "extraparams": FakerField('bothify', text='PARAMS####')
 }
 
 ticket_fields = {
-    "ref": lambda: "FAKETICKET-" + fake.uuid4().replace('-', '')[:10],
-    "track_id": lambda: "TRACK-" + fake.uuid4().replace('-', '')[:10],
-    "origin_email": lambda: fake.email(),
-    "subject": lambda: "Ticket " + fake.sentence(nb_words=3),
-    "message": lambda: fake.text(max_nb_chars=1000),
-    "type_code": lambda: fake.bothify(text='TYPE####'),
-    "category_code": lambda: fake.bothify(text='CAT####'),
-    "severity_code": lambda: fake.bothify(text='SEV####'),
-    "timing": lambda: fake.bothify(text='TIME##'),
+    "ref": HexField("FAKETICKET-", 10),
+    "track_id": HexField("TRACK-", 10),
+    "origin_email": email_pool,
+    "subject": ValuePool(lambda: "Ticket " + fake.sentence(nb_words=3)),
+    "message": long_text_pool,
+    "type_code": FakerField('bothify', text='TYPE####'),
+    "category_code": FakerField('bothify', text='CAT####'),
+    "severity_code": FakerField('bothify', text='SEV####'),
+    "timing": FakerField('bothify', text='TIME##'),
     "import_key": short_import_key,
-    "email_msgid": lambda: "<" + fake.uuid4().replace('-', '') + "@example.com>",
-    "ip": lambda: fake.ipv4()
+    "email_msgid": HexField("<", 32, "@example.com>"),
+    "ip": FakerField('ipv4')
 }
 
 actioncomm_fields = {
-    "ref": lambda: "FAKEEVENT-" + fake.uuid4().replace('-', '')[:10],
-    "ref_ext": lambda: "FAKEEXT-" + fake.uuid4().replace('-', '')[:10],
-    "code": lambda: fake.bothify(text='CODE####'),
-    "location": lambda: fake.city(),
-    "label": lambda: "Event " + fake.sentence(nb_words=3),
-    "note": lambda: fake.text(max_nb_chars=1000),
-    "email_subject": lambda: "Re: " + fake.sentence(nb_words=3),
-    "email_msgid": lambda: "<" + fake.uuid4().replace('-', '') + "@example.com>",
-    "email_from": lambda: fake.email(),
-    "email_sender": lambda: fake.email(),
-    "email_to": lambda: fake.email(),
-    "email_tocc": lambda: fake.email(),
-    "email_tobcc": lambda: fake.email(),
-    "errors_to": lambda: fake.email(),
-    "recurid": lambda: "RECUR-" + fake.uuid4().replace('-', '')[:8],
-    "recurrule": lambda: fake.word(),
-    "elementtype": lambda: fake.word(),
+    "ref": HexField("FAKEEVENT-", 10),
+    "ref_ext": HexField("FAKEEXT-", 10),
+    "code": FakerField('bothify', text='CODE####'),
+    "location": city_pool,
+    "label": ValuePool(lambda: "Event " + fake.sentence(nb_words=3)),
+    "note": long_text_pool,
+    "email_subject": ValuePool(lambda: "Re: " + fake.sentence(nb_words=3)),
+    "email_msgid": HexField("<", 32, "@example.com>"),
+    "email_from": email_pool,
+    "email_sender": email_pool,
+    "email_to": email_pool,
+    "email_tocc": email_pool,
+    "email_tobcc": email_pool,
+    "errors_to": email_pool,
+    "recurid": HexField("RECUR-", 8),
+    "recurrule": word_pool,
+    "elementtype": word_pool,
     "import_key": short_import_key,
-    "extraparams": lambda: fake.bothify(text='PARAMS####'),
-    "reply_to": lambda: fake.email(),
-    "ip": lambda: fake.ipv4()
+    "extraparams": FakerField('bothify', text='PARAMS####'),
+    "reply_to": email_pool,
+    "ip": FakerField('ipv4')
 }
 
 # Clés primaires personnalisées
@@ -593,6 +2173,147 @@ tables_to_anonymize = [
     ("llx_actioncomm", actioncomm_fields)
 ]
 
+def install_rules(config):
+    """Compile la section `rules` de la configuration et l'applique aux tables par défaut."""
+    rules = config.get('rules')
+    if not rules:
+        return
+    from progiclone.rules import compile_rules
+    compiled, keys, labels = compile_rules(rules, tables_to_anonymize, primary_keys, table_labels)
+    tables_to_anonymize[:] = compiled
+    primary_keys.update(keys)
+    table_labels.update(labels)
+
+def mask_secrets(message, secrets):
+    """Remplace les secrets (mot de passe, utilisateur) par des étoiles dans un message d'erreur."""
+    for secret in secrets:
+        if secret:
+            message = message.replace(secret, '********')
+    return message
+
+def strategy_signature(connection_config):
+    """Paramètres qui distinguent une stratégie de connexion (sans identifiants)."""
+    return {key: connection_config.get(key) for key in ('host', 'use_pure', 'auth_plugin')}
+
+def driver_use_pure(driver):
+    """Valeur de `use_pure` du pilote demandé ('auto' : extension C si elle est installée)."""
+    from mysql.connector import HAVE_CEXT
+    if driver == 'c':
+        if not HAVE_CEXT:
+            raise ValueError("pilote 'c' demandé mais l'extension C de mysql-connector n'est pas installée")
+        return False
+    if driver == 'pure':
+        return True
+    return not HAVE_CEXT
+
+def apply_driver(connection_configs, driver):
+    """Applique le pilote aux configurations de connexion.
+
+    'pure' et 'c' s'imposent à toutes les stratégies (doublons retirés) ; 'auto' ne complète
+    que les configurations qui ne fixent pas déjà `use_pure`.
+    """
+    use_pure = driver_use_pure(driver)
+    configured = []
+    for connection_config in connection_configs:
+        if driver != 'auto' or 'use_pure' not in connection_config:
+            connection_config = dict(connection_config, use_pure=use_pure)
+        if connection_config not in configured:
+            configured.append(connection_config)
+    return configured
+
+def connect_first(connection_configs, cache_path, secrets=(), verbose=False):
+    """Essaie les stratégies de connexion en concurrence et retourne (connexion, configuration) de la première réussie.
+
+    La stratégie gagnante est enregistrée dans `cache_path` : aux exécutions suivantes elle est
+    essayée seule en premier, la course n'ayant lieu que si elle échoue. Les tentatives
+    perdantes ne peuvent pas être interrompues : leurs connexions sont fermées dès qu'elles aboutissent.
+    """
+    import queue
+    import mysql.connector
+
+    remembered = None
+    try:
+        with open(cache_path, 'r') as f:
+            remembered = json.load(f).get('strategy')
+    except (OSError, ValueError):
+        pass
+
+    errors = []
+    candidates = list(connection_configs)
+    preferred = [c for c in candidates if strategy_signature(c) == remembered]
+    if preferred:
+        if verbose:
+            print(f"\n\033[93mStratégie de connexion mémorisée : {remembered}\033[0m")
+        try:
+            return mysql.connector.connect(**preferred[0]), preferred[0]
+        except Exception as e:
+            errors.append(mask_secrets(str(e), secrets))
+            if verbose:
+                print(f"\033[91mÉchec de la stratégie mémorisée : {errors[-1]}\033[0m")
+            candidates.remove(preferred[0])
+
+    if verbose:
+        print(f"\n\033[93mTentative de {len(candidates)} stratégies de connexion en parallèle...\033[0m")
+    results = queue.Queue()
+    won = threading.Event()
+    lock = threading.Lock()
+
+    def attempt(connection_config):
+        try:
+            cnx = mysql.connector.connect(**connection_config)
+        except Exception as e:
+            results.put((connection_config, None, e))
+            return
+        with lock:
+            if won.is_set():
+                cnx.close()
+                return
+            won.set()
+        results.put((connection_config, cnx, None))
+
+    for connection_config in candidates:
+        threading.Thread(target=attempt, args=(connection_config,), name='progiclone-connect', daemon=True).start()
+
+    for _ in candidates:
+        connection_config, cnx, error = results.get()
+        if cnx is not None:
+            if verbose:
+                print(f"\033[92mStratégie retenue : {strategy_signature(connection_config)}\033[0m")
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(cache_path, 'w') as f:
+                    json.dump({'strategy': strategy_signature(connection_config)}, f)
+            except OSError as e:
+                logging.debug(f"Impossible d'écrire le cache de connexion {cache_path} : {e}")
+            return cnx, connection_config
+        errors.append(mask_secrets(str(error), secrets))
+        if verbose:
+            print(f"\033[91mÉchec de la tentative {strategy_signature(connection_config)} : {errors[-1]}\033[0m")
+
+    raise Exception(f"Impossible d'établir une connexion MySQL : {errors[-1] if errors else 'aucune stratégie'}")
+
+def read_mysql_greeting(host, port, timeout=2):
+    """Se connecte en TCP et lit le paquet d'accueil (handshake) du serveur MySQL.
+
+    Retourne la version annoncée par le serveur. Lève OSError si la connexion échoue ou est
+    fermée (tunnel pas encore prêt), ValueError si la réponse n'est pas un accueil MySQL.
+    """
+    import socket
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        data = b''
+        while len(data) < 4 or len(data) < 4 + int.from_bytes(data[:3], 'little'):
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("connexion fermée avant l'accueil du serveur MySQL")
+            data += chunk
+    payload = data[4:4 + int.from_bytes(data[:3], 'little')]
+    if payload[:1] == b'\xff':
+        # Paquet d'erreur (hôte bloqué, trop de connexions...) : le serveur répond, le tunnel est actif
+        return f"inconnue, le serveur a répondu : {payload[9:].decode(errors='replace')}"
+    if payload[:1] != b'\x0a':
+        raise ValueError("réponse inattendue, ce n'est pas un serveur MySQL")
+    return payload[1:payload.index(b'\0', 1)].decode(errors='replace')
+
 class AutosshTunnel:
     def __init__(self, ssh_host, ssh_port, ssh_user, ssh_key, ssh_password, remote_bind_port):
         self.ssh_host = ssh_host
@@ -603,31 +2324,44 @@ class AutosshTunnel:
         self.remote_bind_port = remote_bind_port
         self.local_bind_port = 3307
         self.process = None
-
-    def wait_for_port(self, port, host='127.0.0.1', timeout=20):
-        """Attend que le port soit disponible."""
-        import socket
-        import time
-        start_time = time.time()
+        self.stderr_lines = deque(maxlen=STDERR_TAIL_LINES)
+        self.exited = threading.Event()
+        self.setup_time = None
+
+    def drain_stderr(self):
+        """Lit la sortie d'erreur de ssh au fil de l'eau (le tube ne se remplit jamais) et signale sa fin."""
+        for line in iter(self.process.stderr.readline, b''):
+            self.stderr_lines.append(line.decode(errors='replace').rstrip())
+        self.exited.set()
+
+    def stderr_tail(self):
+        return "\n".join(self.stderr_lines)
+
+    def wait_until_ready(self, timeout=20):
+        """Attend que le tunnel transmette réellement vers MySQL.
+
+        Sonde le port local avec une attente exponentielle courte (50 ms à 1 s) et lit le paquet
+        d'accueil du serveur MySQL à travers le tunnel. Retourne la version du serveur, ou None
+        après `timeout` secondes. Lève une exception dès que le processus ssh s'arrête.
+        """
+        delay = 0.05
+        deadline = time.monotonic() + timeout
         while True:
+            if self.exited.is_set() or self.process.poll() is not None:
+                self.process.wait()
+                raise Exception(
+                    f"le processus ssh s'est arrêté (code {self.process.returncode}) :\n{self.stderr_tail()}"
+                )
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
             try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(1)
-                result = sock.connect_ex((host, port))
-                sock.close()
-                if result == 0:
-                    return True
-            except:
-                pass
-            finally:
-                if sock:
-                    sock.close()
-            
-            if time.time() - start_time > timeout:
-                return False
-            
-            time.sleep(1)
-            print(".", end="", flush=True)
+                return read_mysql_greeting('127.0.0.1', self.local_bind_port, timeout=min(2, remaining))
+            except (OSError, ValueError) as e:
+                logging.debug(f"Tunnel pas encore prêt : {e}")
+            # Attente interrompue immédiatement si ssh se termine
+            self.exited.wait(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 2, 1.0)
 
     def start_tunnel(self):
         # Vérifier si sshpass est installé
@@ -672,20 +2406,24 @@ class AutosshTunnel:
             except socket.error:
                 raise Exception(f"Le port {self.local_bind_port} est déjà utilisé")
 
+            started = time.monotonic()
             self.process = subprocess.Popen(
                 autossh_cmd,
-                stdout=subprocess.PIPE,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE
             )
+            threading.Thread(target=self.drain_stderr, name='progiclone-ssh-stderr', daemon=True).start()
 
-            print("\nAttente de l'établissement du tunnel", end="", flush=True)
-            if not self.wait_for_port(self.local_bind_port):
-                stdout, stderr = self.process.communicate()
-                print(f"\n\033[91mSortie standard : {stdout.decode()}\033[0m")
-                print(f"\033[91mErreur standard : {stderr.decode()}\033[0m")
+            print("\nAttente de l'établissement du tunnel...", flush=True)
+            server_version = self.wait_until_ready()
+            if server_version is None:
+                print(f"\033[91mErreur standard : {self.stderr_tail()}\033[0m")
                 raise Exception("Impossible d'établir le tunnel SSH après 20 secondes")
+            self.setup_time = time.monotonic() - started
 
-            print(f"\n\033[92mTunnel SSH établi sur le port local {self.local_bind_port}. ✅\033[0m")
+            print(f"\033[92mTunnel SSH établi sur le port local {self.local_bind_port} en {self.setup_time:.2f} s "
+                  f"(MySQL {server_version}). ✅\033[0m")
 
         except Exception as e:
             if self.process:
@@ -705,7 +2443,8 @@ class AutosshTunnel:
 
 
 def test_mysql_connection(host, port, user, password, database, timeout=10):
-    time.sleep(5)  # Attendre que le tunnel soit bien établi
+    import mysql.connector
+    from mysql.connector import Error
     try:
         cnx = mysql.connector.connect(
             host=host,
@@ -729,6 +2468,39 @@ def test_mysql_connection(host, port, user, password, database, timeout=10):
     except Exception as e:
         return False, str(e)
 
+def run_dump_anonymization(args):
+    """Mode hors ligne : anonymise un fichier mysqldump sans connexion à une base de données.
+
+    Les messages sont écrits sur la sortie d'erreur, la sortie standard pouvant recevoir le dump.
+    """
+    from progiclone.dump import anonymize_dump, DumpError
+    if not args.dump_out:
+        print("\033[91mErreur: --dump-out est obligatoire avec --dump-in\033[0m", file=sys.stderr)
+        sys.exit(1)
+    try:
+        config = get_config_from_args(args)
+        options = get_run_options(args, config)
+        install_rules(config)
+    except Exception as e:
+        print(f"\033[91mErreur lors du chargement de la configuration: {str(e)}\033[0m", file=sys.stderr)
+        sys.exit(1)
+    if options['seed'] is not None:
+        fake.seed_instance(options['seed'])
+
+    tables_to_process = select_tables(args, config, options)
+    try:
+        rows_rewritten = anonymize_dump(args.dump_in, args.dump_out, tables_to_process)
+    except OSError as e:
+        print(f"\033[91mErreur lors de la lecture ou de l'écriture du dump : {e}\033[0m", file=sys.stderr)
+        sys.exit(1)
+    except (DumpError, UniqueValueError) as e:
+        print(f"\033[91mDump non anonymisé : {e}\033[0m", file=sys.stderr)
+        sys.exit(1)
+
+    for table_name, count in rows_rewritten.items():
+        print(f"\033[92m{table_name}: {count} enregistrement(s) anonymisé(s) ✅\033[0m", file=sys.stderr)
+    print(f"\n\033[92mDump anonymisé écrit dans {args.dump_out} ✅\033[0m", file=sys.stderr)
+
 def main():
     # Parse les arguments
     args = parse_args()
@@ -737,9 +2509,22 @@ def main():
     log_level = logging.DEBUG if args.verbose else logging.INFO
     logging.basicConfig(level=log_level, format='%(message)s')
 
+    # Mode hors ligne : aucun accès à une base de données
+    if args.dump_in:
+        run_dump_anonymization(args)
+        return
+
+    import mysql.connector
+    from mysql.connector import Error
+
+    # Vérification des mises à jour en arrière-plan (résultat en cache, jamais bloquante)
+    update_check = None if update_check_disabled(args) else UpdateCheck().start()
+
     # En mode non-interactif, on n'affiche pas le logo
     if not args.non_interactive:
         print_logo()
+    if update_check:
+        update_check.report()
 
     # Si on est en mode non-interactif, on vérifie qu'on a soit un fichier de config
     # soit tous les arguments MySQL nécessaires
@@ -756,10 +2541,30 @@ def main():
     # Récupération de la configuration
     try:
         config = get_config_from_args(args)
+        options = get_run_options(args, config)
+        install_rules(config)
     except Exception as e:
         print(f"\033[91mErreur lors du chargement de la configuration: {str(e)}\033[0m")
         sys.exit(1)
 
+    if options['seed'] is not None:
+        fake.seed_instance(options['seed'])
+        if options['sql_pushdown']:
+            # RAND() côté serveur ne suit pas la graine : les valeurs ne seraient plus reproductibles
+            print("\033[93m--sql-pushdown ignoré : une graine (--seed) est fixée, toutes les colonnes "
+                  "sont générées côté client.\033[0m")
+            options['sql_pushdown'] = False
+    try:
+        use_pure = driver_use_pure(options['driver'])
+    except ValueError as e:
+        print(f"\033[91mErreur: {e}\033[0m")
+        sys.exit(1)
+    logging.debug(f"Pilote MySQL : {'Python pur' if use_pure else 'extension C'} ({options['driver']})")
+    metrics = options['metrics'] = RunMetrics()
+    options['profiler'] = Profiler() if options['profile'] else None
+    if options['profile_dump']:
+        options['profiler'].start_cprofile()
+
     # En mode interactif sans config complète, on demande les informations manquantes
     if not args.non_interactive:
         if args.use_ssh or (args.config and 'ssh' in config):
@@ -784,7 +2589,22 @@ def main():
             }
 
     cnx = None
+    failed_tables = []
     mysql_config = config.get('mysql', {})
+
+    # Point de reprise de l'exécution
+    run_host = config['ssh']['host'] if 'ssh' in config else mysql_config.get('host')
+    checkpoint_path = options['checkpoint_file'] or cache_file_path('checkpoint', run_host, mysql_config.get('database'))
+    run_params = {'host': run_host, 'database': mysql_config.get('database'), 'shards': options['shards']}
+    options['schema_cache'] = cache_file_path('schema', run_host, mysql_config.get('database'))
+    options['checkpoint'] = None
+    if not options['plan'] and not options['clone_target']:
+        try:
+            options['checkpoint'] = Checkpoint.open(checkpoint_path, run_params, options['resume'])
+        except (OSError, ValueError) as e:
+            print(f"\033[91mErreur avec le point de reprise : {e}\033[0m")
+            sys.exit(1)
+        logging.info(f"Point de reprise : {checkpoint_path} (relancez avec --resume en cas d'interruption)")
     
     # Si on utilise SSH
     if 'ssh' in config:
@@ -806,7 +2626,7 @@ def main():
 
         try:
             tunnel.start_tunnel()
-            time.sleep(5)
+            metrics.tunnel_seconds = tunnel.setup_time
 
             print("\n\033[93mConnexion à la base de données MYSQL via le tunnel SSH...\033[0m 🚀")
             
@@ -845,36 +2665,18 @@ def main():
                 }
             ]
 
-            last_error = None
-            for config in connection_configs:
-                try:
-                    safe_config = config.copy()
-                    safe_config['password'] = '********'
-                    if not args.non_interactive:
-                        print(f"\n\033[93mTentative de connexion avec la configuration : {safe_config}\033[0m")
-                    cnx = mysql.connector.connect(**config)
-                    print("\033[92mConnexion MySQL réussie via le tunnel SSH. ✅\033[0m")
-                    break
-                except Exception as e:
-                    last_error = str(e)
-                    if mysql_config.get('password') and mysql_config['password'] in last_error:
-                        last_error = last_error.replace(mysql_config['password'], '********')
-                    if mysql_config['user'] and mysql_config['user'] in last_error:
-                        last_error = last_error.replace(mysql_config['user'], '********')
-                    if not args.non_interactive:
-                        print(f"\033[91mÉchec de la tentative : {last_error}\033[0m")
-            else:
-                raise Exception(f"Impossible d'établir une connexion MySQL : {last_error}")
-
-            print("\n\033[93mDébut de l'anonymisation...\033[0m 🚀")
-            
-            # Si des tables spécifiques sont demandées
-            if args.tables:
-                tables_to_process = [(t, d) for t, d in tables_to_anonymize if t in args.tables]
-            else:
-                tables_to_process = tables_to_anonymize
+            started = time.monotonic()
+            cnx, connection_config = connect_first(
+                apply_driver(connection_configs, options['driver']),
+                cache_file_path('connection', ssh_config['host'], tunnel.remote_bind_port),
+                secrets=[mysql_config.get('password'), mysql_config['user']],
+                verbose=not args.non_interactive
+            )
+            metrics.connect_seconds = time.monotonic() - started
+            cnx = profile_connection(cnx, options)
+            print("\033[92mConnexion MySQL réussie via le tunnel SSH. ✅\033[0m")
 
-            anonymize_data(cnx, primary_keys, table_labels, tables_to_process)
+            failed_tables = run_anonymization(cnx, args, config, options, connection_config)
 
         except Exception as e:
             print(f"\033[91mUne erreur est survenue : {e}\033[0m")
@@ -889,31 +2691,30 @@ def main():
                 cnx.close()
                 print("\033[92mConnexion MySQL fermée. ✅\033[0m")
             tunnel.stop_tunnel()
+            write_run_reports(options)
 
     else:
         # Connexion directe MySQL
         print("\n\033[96mConnexion directe MySQL...\033[0m")
 
         try:
-            cnx = mysql.connector.connect(
-                host=mysql_config['host'],
-                port=mysql_config.get('port', 3306),
-                user=mysql_config['user'],
-                password=mysql_config.get('password', ''),
-                database=mysql_config['database'],
-                connection_timeout=10
-            )
+            connection_config = {
+                'host': mysql_config['host'],
+                'port': mysql_config.get('port', 3306),
+                'user': mysql_config['user'],
+                'password': mysql_config.get('password', ''),
+                'database': mysql_config['database'],
+                'connection_timeout': 10,
+                'allow_local_infile': True,
+                'use_pure': use_pure
+            }
+            started = time.monotonic()
+            cnx = mysql.connector.connect(**connection_config)
+            metrics.connect_seconds = time.monotonic() - started
+            cnx = profile_connection(cnx, options)
             print("\033[92mConnexion MySQL directe réussie. ✅\033[0m")
 
-            print("\n\033[93mDébut de l'anonymisation...\033[0m 🚀")
-            
-            # Si des tables spécifiques sont demandées
-            if args.tables:
-                tables_to_process = [(t, d) for t, d in tables_to_anonymize if t in args.tables]
-            else:
-                tables_to_process = tables_to_anonymize
-
-            anonymize_data(cnx, primary_keys, table_labels, tables_to_process)
+            failed_tables = run_anonymization(cnx, args, config, options, connection_config)
 
         except Error as err:
             print(f"\033[91mErreur de connexion MySQL: {err}\033[0m")
@@ -923,13 +2724,28 @@ def main():
             if cnx and cnx.is_connected():
                 cnx.close()
                 print("\033[92mConnexion MySQL fermée. ✅\033[0m")
-
-    print("\n\033[92mAnonymisation terminée avec succès ! ✅\033[0m")
+            write_run_reports(options)
+
+    if options['plan']:
+        print("\n\033[92mPlanification terminée, aucune donnée n'a été modifiée. ✅\033[0m")
+    elif failed_tables:
+        # Le point de reprise est conservé : --resume reprend les tables en échec
+        print(f"\n\033[91mAnonymisation incomplète : {len(failed_tables)} table(s) en échec "
+              f"({', '.join(failed_tables)}).\033[0m")
+        if options['checkpoint']:
+            print(f"Relancez avec --resume pour reprendre (point de reprise : {options['checkpoint'].path}).")
+        sys.exit(1)
+    else:
+        if options['checkpoint']:
+            options['checkpoint'].remove()
+        print("\n\033[92mAnonymisation terminée avec succès ! ✅\033[0m")
+    if update_check:
+        update_check.report()
     print("\nMerci d'avoir utilisé Progiclone par VLTN x Progiseize. À bientôt 👋!")
 
 if __name__ == "__main__":
+    check_dependencies()
     try:
-        check_updates()
         main()
     except KeyboardInterrupt:
         print("\nMerci d'avoir utilisé Progiclone par VLTN x Progiseize. À bientôt 👋!")
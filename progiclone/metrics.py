@@ -0,0 +1,159 @@
+# progiclone/metrics.py
+# Mesures d'exécution (--metrics-json, --metrics-prometheus) : enregistrements, transactions et
+# temps par phase pour chaque table, latence du tunnel et de la connexion pour le run.
+import json
+import logging
+import os
+import threading
+import time
+from progiclone import __version__
+
+class TableMetrics:
+    """Mesures d'une table (partagées entre les plages d'une table sharded).
+
+    Enregistrements traités et en échec, transactions validées et temps passé par phase :
+    lecture des IDs, génération des valeurs fictives, écriture en base et commit.
+    """
+    PHASES = ('read', 'generation', 'database', 'commit')
+
+    def __init__(self, table_name, progress=None):
+        self.table_name = table_name
+        self.progress = progress
+        self.engine = None
+        self.rows = 0
+        self.failed = 0
+        self.chunks = 0
+        self.committed_rows = 0
+        self.sql_rows = 0
+        self.elapsed = 0.0
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+        self._lock = threading.Lock()
+
+    @property
+    def commit_time(self):
+        return self.phases['commit']
+
+    def add(self, phase, seconds, rows=0):
+        """Ajoute `seconds` au temps de la phase et `rows` aux enregistrements traités."""
+        with self._lock:
+            self.phases[phase] += seconds
+            self.rows += rows
+
+    def record(self, rows, elapsed, sql_pushdown=False):
+        """Compte une transaction validée de `rows` enregistrements (appelé par ChunkedCommitter).
+
+        Les lignes réécrites côté serveur (--sql-pushdown) sont comptées à part, dans `sql_rows` :
+        elles ont souvent déjà été comptées par le passage ligne à ligne de la même table.
+        """
+        with self._lock:
+            self.chunks += 1
+            if sql_pushdown:
+                self.sql_rows += rows
+            else:
+                self.committed_rows += rows
+            self.phases['commit'] += elapsed
+            if self.progress is not None:
+                self.progress.set_postfix(commits=self.chunks, refresh=False)
+
+    def to_dict(self):
+        return {
+            'engine': self.engine,
+            'rows': self.rows,
+            'failed': self.failed,
+            'commits': self.chunks,
+            'committed_rows': self.committed_rows,
+            'sql_rows': self.sql_rows,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows / self.elapsed, 1) if self.elapsed > 0 else None,
+            'phase_seconds': {phase: round(seconds, 3) for phase, seconds in self.phases.items()},
+        }
+
+class RunMetrics:
+    """Mesures d'une exécution : latence du tunnel et de la connexion, mesures par table.
+
+    Exportées en JSON (--metrics-json) et au format textfile de Prometheus (--metrics-prometheus).
+    """
+    def __init__(self):
+        self.started = time.time()
+        self.tunnel_seconds = None
+        self.connect_seconds = None
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def table(self, table_name):
+        with self._lock:
+            if table_name not in self.tables:
+                self.tables[table_name] = TableMetrics(table_name)
+            return self.tables[table_name]
+
+    def to_dict(self):
+        return {
+            'version': __version__,
+            'started_at': self.started,
+            'duration_seconds': round(time.time() - self.started, 3),
+            'tunnel_seconds': round(self.tunnel_seconds, 3) if self.tunnel_seconds is not None else None,
+            'connect_seconds': round(self.connect_seconds, 3) if self.connect_seconds is not None else None,
+            'tables': {table_name: metrics.to_dict() for table_name, metrics in self.tables.items()},
+        }
+
+    def prometheus_lines(self):
+        data = self.to_dict()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP progiclone_{name} {help_text}")
+            lines.append(f"# TYPE progiclone_{name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"progiclone_{name}{{{label_text}}} {value}" if label_text else f"progiclone_{name} {value}")
+
+        metric('last_run_timestamp_seconds', "Début de la dernière exécution", [({}, data['started_at'])])
+        metric('run_duration_seconds', "Durée de l'exécution", [({}, data['duration_seconds'])])
+        if data['tunnel_seconds'] is not None:
+            metric('tunnel_setup_seconds', "Établissement du tunnel SSH", [({}, data['tunnel_seconds'])])
+        if data['connect_seconds'] is not None:
+            metric('connect_seconds', "Connexion MySQL", [({}, data['connect_seconds'])])
+        tables = data['tables']
+        for name, key, help_text in (('table_rows', 'rows', "Enregistrements traités"),
+                                     ('table_failed_rows', 'failed', "Enregistrements en échec"),
+                                     ('table_commits', 'commits', "Transactions validées"),
+                                     ('table_sql_rows', 'sql_rows', "Enregistrements réécrits côté serveur"),
+                                     ('table_duration_seconds', 'elapsed_seconds', "Durée de traitement de la table"),
+                                     ('table_rows_per_second', 'rows_per_second', "Débit")):
+            metric(name, help_text, [({'table': t}, m[key]) for t, m in tables.items() if m[key] is not None])
+        metric('table_phase_seconds', "Temps passé par phase",
+               [({'table': t, 'phase': phase}, seconds)
+                for t, m in tables.items() for phase, seconds in m['phase_seconds'].items()])
+        return lines
+
+    def write(self, json_path=None, prometheus_path=None):
+        """Écrit les rapports demandés, de manière atomique (fichier temporaire puis renommage)."""
+        for path, content in ((json_path, lambda: json.dumps(self.to_dict(), indent=2)),
+                              (prometheus_path, lambda: "\n".join(self.prometheus_lines()) + "\n")):
+            if not path:
+                continue
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(content())
+            os.replace(tmp_path, path)
+            logging.info(f"Mesures écrites dans {path}")
+
+def table_metrics(options, table_name):
+    """Mesures de la table dans le rapport du run, ou mesures isolées s'il n'y en a pas."""
+    metrics = options.get('metrics')
+    return metrics.table(table_name) if metrics else TableMetrics(table_name)
+
+def timed_iter(iterable, stats, phase='read'):
+    """Parcourt `iterable` en ajoutant le temps de chaque élément à la phase `phase` de `stats`."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            stats.add(phase, time.perf_counter() - start)
+            return
+        stats.add(phase, time.perf_counter() - start)
+        yield item
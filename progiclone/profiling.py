@@ -0,0 +1,186 @@
+# progiclone/profiling.py
+# Mode --profile : compteurs de temps par générateur de champ et par classe de requête SQL,
+# classement des champs et tables les plus coûteux, et export cProfile/pstats optionnel.
+import re
+import sys
+import threading
+import time
+
+TABLE_RE = re.compile(r"\b(?:UPDATE|FROM|INTO|TABLE|TABLES)\s+(?:TABLE\s+)?(?:IF\s+(?:NOT\s+)?EXISTS\s+)?`?([\w.]+)`?",
+                      re.I)
+# Tables de travail (transit, copie shadow) comptées avec leur table d'origine
+WORK_TABLE_RE = re.compile(r"_progiclone_(?:new|old|stage)$")
+
+def statement_class(statement):
+    """Retourne (classe, table) d'une requête SQL : 'UPDATE (lot)', 'INSERT SELECT', 'LOAD DATA'..."""
+    words = statement.lstrip().split(None, 2)
+    keyword = words[0].upper() if words else ""
+    upper = statement.upper()
+    if keyword == "UPDATE":
+        kind = "UPDATE (lot)" if " JOIN " in upper else "UPDATE"
+    elif keyword == "INSERT":
+        kind = "INSERT SELECT" if " SELECT " in upper else "INSERT"
+    elif keyword == "LOAD":
+        kind = "LOAD DATA"
+    elif keyword in ("CREATE", "DROP", "RENAME", "ALTER") and len(words) > 1:
+        kind = f"{keyword} {words[1].upper()}"
+    else:
+        kind = keyword
+    match = TABLE_RE.search(statement)
+    return kind, WORK_TABLE_RE.sub("", match.group(1)) if match else None
+
+class ProfiledField:
+    """Générateur de champ instrumenté : temps passé et nombre de valeurs générées."""
+    def __init__(self, inner, table_name, field, profiler):
+        self.inner = inner
+        self.table_name = table_name
+        self.field = field
+        self.profiler = profiler
+
+    def __call__(self):
+        start = time.perf_counter()
+        value = self.inner()
+        self.record(time.perf_counter() - start, 1)
+        return value
+
+    def record(self, seconds, count):
+        self.profiler.record_field(self.table_name, self.field, seconds, count)
+
+class ProfiledCursor:
+    """Curseur dont chaque requête est chronométrée et rangée par classe de requête et par table."""
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._profiler.record_statement(operation, time.perf_counter() - start)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._profiler.record_statement(operation, time.perf_counter() - start)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class ProfiledConnection:
+    """Connexion MySQL dont les curseurs et les commits sont chronométrés."""
+    def __init__(self, cnx, profiler):
+        self._cnx = cnx
+        self._profiler = profiler
+
+    def cursor(self, *args, **kwargs):
+        return ProfiledCursor(self._cnx.cursor(*args, **kwargs), self._profiler)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return self._cnx.commit()
+        finally:
+            self._profiler.record_statement("COMMIT", time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+class Profiler:
+    """Compteurs de l'exécution : temps par champ (table.colonne) et par (classe de requête, table)."""
+    def __init__(self):
+        self.fields = {}
+        self.statements = {}
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self._thread_profiles = []
+
+    def record_field(self, table_name, field, seconds, count):
+        with self._lock:
+            counter = self.fields.setdefault((table_name, field), [0.0, 0])
+            counter[0] += seconds
+            counter[1] += count
+
+    def record_statement(self, statement, seconds):
+        key = statement_class(statement)
+        with self._lock:
+            counter = self.statements.setdefault(key, [0.0, 0])
+            counter[0] += seconds
+            counter[1] += 1
+
+    def wrap_tables(self, tables):
+        """Remplace les générateurs de [(table, champs)] par des ProfiledField."""
+        return [
+            (table_name, {field: ProfiledField(gen, table_name, field, self) for field, gen in fields_dict.items()})
+            for table_name, fields_dict in tables
+        ]
+
+    def wrap_connection(self, cnx):
+        return ProfiledConnection(cnx, self)
+
+    def start_cprofile(self):
+        """Active cProfile sur le thread principal et sur les workers démarrés ensuite."""
+        import cProfile
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+        # Avant Python 3.12, un profileur ne suit que le thread qui l'a activé : chaque worker
+        # active le sien à son démarrage. Depuis 3.12, le profileur couvre tous les threads.
+        if sys.version_info < (3, 12):
+            def start_thread_profile(frame, event, arg):
+                profile = cProfile.Profile()
+                with self._lock:
+                    self._thread_profiles.append(profile)
+                profile.enable()
+            threading.setprofile(start_thread_profile)
+
+    def dump_cprofile(self, path):
+        """Arrête cProfile et écrit les statistiques fusionnées (lisibles avec pstats ou snakeviz)."""
+        import pstats
+        if self._cprofile is None:
+            return
+        threading.setprofile(None)
+        self._cprofile.disable()
+        stats = pstats.Stats(self._cprofile)
+        for profile in self._thread_profiles:
+            profile.disable()
+            stats.add(profile)
+        stats.dump_stats(path)
+        self._cprofile = None
+
+    def table_costs(self):
+        """Retourne {table: [temps de génération, temps SQL]}."""
+        tables = {}
+        for (table_name, _), (seconds, _) in self.fields.items():
+            tables.setdefault(table_name, [0.0, 0.0])[0] += seconds
+        for (_, table_name), (seconds, _) in self.statements.items():
+            if table_name:
+                tables.setdefault(table_name, [0.0, 0.0])[1] += seconds
+        return tables
+
+    def report(self, limit=15):
+        """Rapport texte : champs, tables et classes de requêtes les plus coûteux, par temps décroissant."""
+        lines = ["Champs les plus coûteux (génération) :"]
+        fields = sorted(self.fields.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        for rank, ((table_name, field), (seconds, count)) in enumerate(fields, 1):
+            per_value = seconds / count * 1e6 if count else 0
+            lines.append(f"  {rank:>2}. {table_name + '.' + field:<50} {seconds:>9.3f} s  "
+                         f"{count:>10} valeur(s)  {per_value:>8.1f} µs/valeur")
+
+        lines.append("Tables les plus coûteuses :")
+        tables = sorted(self.table_costs().items(), key=lambda item: sum(item[1]), reverse=True)[:limit]
+        for rank, (table_name, (generation, sql)) in enumerate(tables, 1):
+            lines.append(f"  {rank:>2}. {table_name:<50} {generation + sql:>9.3f} s  "
+                         f"(génération {generation:.3f} s, SQL {sql:.3f} s)")
+
+        lines.append("Requêtes SQL par classe :")
+        statements = sorted(self.statements.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        for rank, ((kind, table_name), (seconds, count)) in enumerate(statements, 1):
+            per_call = seconds / count * 1e3 if count else 0
+            lines.append(f"  {rank:>2}. {kind:<16} {table_name or '-':<30} {seconds:>9.3f} s  "
+                         f"{count:>8} requête(s)  {per_call:>8.2f} ms/requête")
+        return lines
@@ -0,0 +1,112 @@
+# progiclone/rules.py
+# Règles d'anonymisation déclarées dans la configuration (clé `rules`) : table, clé primaire et,
+# pour chaque colonne, un générateur avec ses arguments. Les règles sont compilées au démarrage
+# en générateurs de champs ; les tables intégrées de main.py forment le jeu de règles par défaut.
+from progiclone.fields import fake, BUILTIN_POOLS, ConstantField, FakerField, HexField, ValuePool
+
+# Générateurs prenant un motif Faker (`#` chiffre, `?` lettre)
+PATTERN_PROVIDERS = ('bothify', 'numerify', 'lexify')
+
+def faker_provider(name, where):
+    """Vérifie que `name` est un fournisseur Faker de la locale utilisée."""
+    if not isinstance(name, str) or name.startswith('_') or not callable(getattr(fake.default_instance(), name, None)):
+        raise ValueError(f"{where} : fournisseur Faker inconnu '{name}'")
+    return name
+
+def compile_field(spec, where, pools):
+    """Compile la règle d'une colonne en générateur de champ.
+
+    Formes acceptées :
+      - `company`, `email`... : réservoir intégré du même nom (valeurs partagées entre colonnes)
+      - `uuid4`, `iban`... : fournisseur Faker appelé à chaque ligne
+      - {constant: valeur}
+      - {hex: longueur, prefix: '...', suffix: '...'} : référence fictive hexadécimale
+      - {bothify|numerify|lexify: motif}
+      - {choice: [valeurs]}
+      - {faker: fournisseur, args: {...}, pool: true} : fournisseur avec arguments, éventuellement
+        servi par un réservoir (taille réglée comme les autres par pool_size et options.pools)
+    """
+    if isinstance(spec, str):
+        if spec in BUILTIN_POOLS:
+            return BUILTIN_POOLS[spec]
+        return FakerField(faker_provider(spec, where))
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where} : règle invalide {spec!r} (nom de générateur ou dictionnaire attendu)")
+
+    if 'constant' in spec:
+        return ConstantField(spec['constant'])
+    if 'hex' in spec:
+        length = int(spec['hex'])
+        if not 1 <= length <= 32:
+            raise ValueError(f"{where} : la longueur 'hex' doit être comprise entre 1 et 32")
+        return HexField(str(spec.get('prefix', '')), length, str(spec.get('suffix', '')))
+    for provider in PATTERN_PROVIDERS:
+        if provider in spec:
+            return FakerField(provider, text=str(spec[provider]))
+    if 'choice' in spec:
+        elements = spec['choice']
+        if not isinstance(elements, list) or not elements:
+            raise ValueError(f"{where} : 'choice' attend une liste non vide")
+        return FakerField('random_element', elements=elements)
+    if 'faker' in spec:
+        provider = faker_provider(spec['faker'], where)
+        args = spec.get('args') or {}
+        if not isinstance(args, dict):
+            raise ValueError(f"{where} : 'args' doit être un dictionnaire d'arguments nommés")
+        field = FakerField(provider, **args)
+        pool = spec.get('pool')
+        if not pool:
+            return field
+        # Un même fournisseur avec les mêmes arguments partage son réservoir entre colonnes
+        key = (provider, repr(sorted(args.items())))
+        if key not in pools:
+            name = f"{provider}{key[1]}" if args else provider
+            pools[key] = ValuePool(field, name=name)
+        return pools[key]
+    raise ValueError(f"{where} : règle inconnue {spec!r} (constant, hex, bothify, numerify, lexify, "
+                     "choice ou faker attendu)")
+
+def compile_rules(rules, tables, primary_keys, table_labels):
+    """Applique la section `rules` au jeu de règles par défaut.
+
+    Retourne (tables, clés primaires, libellés). Une table à `null` n'est plus anonymisée ; une
+    colonne à `null` est retirée ; `replace: true` remplace toutes les colonnes par défaut de la table.
+    """
+    if not isinstance(rules, dict):
+        raise ValueError("La section 'rules' doit associer à chaque table sa règle")
+    fields_by_table = dict(tables)
+    order = [table_name for table_name, _ in tables]
+    primary_keys = dict(primary_keys)
+    table_labels = dict(table_labels)
+    pools = {}
+    for table_name, rule in rules.items():
+        if rule is None:
+            fields_by_table.pop(table_name, None)
+            continue
+        if not isinstance(rule, dict):
+            raise ValueError(f"rules.{table_name} : dictionnaire attendu (pk, label, replace, columns)")
+        unknown = set(rule) - {'pk', 'label', 'replace', 'columns'}
+        if unknown:
+            raise ValueError(f"rules.{table_name} : clé(s) inconnue(s) {', '.join(sorted(unknown))}")
+        columns = rule.get('columns') or {}
+        if not isinstance(columns, dict):
+            raise ValueError(f"rules.{table_name}.columns : dictionnaire colonne → générateur attendu")
+
+        fields_dict = {} if rule.get('replace') else dict(fields_by_table.get(table_name, {}))
+        for column, spec in columns.items():
+            if spec is None:
+                fields_dict.pop(column, None)
+            else:
+                fields_dict[column] = compile_field(spec, f"rules.{table_name}.columns.{column}", pools)
+        if not fields_dict:
+            raise ValueError(f"rules.{table_name} : aucune colonne à anonymiser")
+        if table_name not in order:
+            order.append(table_name)
+        fields_by_table[table_name] = fields_dict
+        if rule.get('pk'):
+            primary_keys[table_name] = rule['pk']
+        if rule.get('label'):
+            table_labels[table_name] = rule['label']
+
+    compiled = [(table_name, fields_by_table[table_name]) for table_name in order if table_name in fields_by_table]
+    return compiled, primary_keys, table_labels
@@ -0,0 +1,164 @@
+# progiclone/session.py
+# Briques partagées par l'anonymisation en place et le mode clone : réglages de session
+# (--bulk-session), transactions validées par tranches (intervalles de commit) et connexions
+# chronométrées par le profileur (--profile).
+import time
+from contextlib import contextmanager
+
+# Nombre de lignes envoyées par requête UPDATE groupée
+DEFAULT_BATCH_SIZE = 500
+
+# Réglages de session du mode --bulk-session (variable, valeur) : pas de binlog ni de journal
+# général, pas de contrôle des clés étrangères et d'unicité, isolation READ COMMITTED
+BULK_SESSION_SETTINGS = [
+    ('sql_log_bin', 0),
+    ('sql_log_off', 1),
+    ('foreign_key_checks', 0),
+    ('unique_checks', 0),
+    ('transaction_isolation', 'READ-COMMITTED'),
+]
+
+# Anciens noms des variables de session (MySQL < 5.7.20, MariaDB < 11.1)
+SESSION_VARIABLE_ALIASES = {'transaction_isolation': 'tx_isolation'}
+
+# Nombre d'enregistrements par transaction par défaut (taille du journal d'annulation InnoDB bornée)
+DEFAULT_COMMIT_ROWS = 10000
+
+def commit_interval(options, table_name):
+    """Retourne l'intervalle de commit (enregistrements, secondes) de la table.
+
+    Les réglages `commit_intervals` d'une table priment sur `commit_rows`/`commit_seconds`.
+    """
+    table_interval = (options.get('commit_intervals') or {}).get(table_name) or {}
+    rows = table_interval.get('rows', options.get('commit_rows', DEFAULT_COMMIT_ROWS))
+    seconds = table_interval.get('seconds', options.get('commit_seconds'))
+    return (int(rows) if rows else None), (float(seconds) if seconds else None)
+
+class ChunkedCommitter:
+    """Valide la transaction en cours par tranches de `rows` enregistrements et/ou de `seconds` secondes.
+
+    Le journal d'annulation et les verrous restent bornés quelle que soit la taille de la table.
+    Après chaque commit, le dernier ID validé est enregistré dans le point de reprise.
+    `sql_pushdown` range les enregistrements validés dans les mesures du calcul côté serveur.
+    """
+    def __init__(self, cnx, rows=DEFAULT_COMMIT_ROWS, seconds=None, checkpoint=None, checkpoint_key=None,
+                 stats=None, sql_pushdown=False):
+        self.cnx = cnx
+        self.rows = rows
+        self.seconds = seconds
+        self.checkpoint = checkpoint
+        self.checkpoint_key = checkpoint_key
+        self.stats = stats
+        self.sql_pushdown = sql_pushdown
+        self.pending_rows = 0
+        self.pending_pk = None
+        self.committed_pk = None
+        self.started = time.monotonic()
+
+    def due(self):
+        if not self.pending_rows:
+            return False
+        if self.rows and self.pending_rows >= self.rows:
+            return True
+        return bool(self.seconds) and time.monotonic() - self.started >= self.seconds
+
+    def add(self, count, last_pk):
+        """Compte `count` enregistrements modifiés jusqu'à l'ID `last_pk` et valide si l'intervalle est atteint."""
+        self.pending_rows += count
+        self.pending_pk = last_pk
+        if self.due():
+            self.commit()
+
+    def commit(self):
+        """Valide les modifications en attente (sans effet s'il n'y en a pas)."""
+        if not self.pending_rows:
+            return
+        start = time.monotonic()
+        self.cnx.commit()
+        elapsed = time.monotonic() - start
+        if self.checkpoint and self.pending_pk is not None:
+            self.checkpoint.update(self.checkpoint_key, self.pending_pk)
+        if self.stats:
+            self.stats.record(self.pending_rows, elapsed, self.sql_pushdown)
+        self.committed_pk = self.pending_pk
+        self.pending_rows = 0
+        self.started = time.monotonic()
+
+def apply_bulk_session(cnx):
+    """Applique BULK_SESSION_SETTINGS à la session, réglage par réglage.
+
+    Retourne (valeurs précédentes, [(variable, erreur)] des réglages refusés, faute de privilège
+    ou de support par le serveur).
+    """
+    from mysql.connector import Error
+    # sql_log_bin ne peut pas changer au milieu d'une transaction
+    cnx.commit()
+    cursor = cnx.cursor()
+    previous = {}
+    failures = []
+    for name, value in BULK_SESSION_SETTINGS:
+        error = None
+        for variable in (name, SESSION_VARIABLE_ALIASES.get(name)):
+            if not variable:
+                continue
+            try:
+                cursor.execute(f"SELECT @@SESSION.{variable}")
+                current = cursor.fetchone()[0]
+                cursor.execute(f"SET SESSION {variable} = %s", (value,))
+                previous[variable] = current
+                error = None
+                break
+            except Error as err:
+                error = err
+        if error is not None:
+            failures.append((name, str(error)))
+    return previous, failures
+
+def restore_session(cnx, previous, commit=True):
+    """Rétablit les variables de session sauvegardées par apply_bulk_session.
+
+    La transaction en cours est d'abord terminée (sql_log_bin ne peut pas changer en cours de
+    transaction) : validée, ou annulée avec `commit=False` quand une erreur est en cours.
+    """
+    from mysql.connector import Error
+    if commit:
+        cnx.commit()
+    else:
+        cnx.rollback()
+    cursor = cnx.cursor()
+    for variable, value in previous.items():
+        try:
+            cursor.execute(f"SET SESSION {variable} = %s", (value,))
+        except Error as err:
+            print(f"\033[91mImpossible de rétablir {variable}: {err}\033[0m")
+
+@contextmanager
+def bulk_session(cnx, options):
+    """Active le mode --bulk-session sur la connexion principale le temps du bloc, puis rétablit la session.
+
+    Si le bloc lève une exception, rien n'est validé et un échec du rétablissement (connexion
+    perdue...) est seulement signalé : l'exception d'origine est propagée.
+    """
+    from mysql.connector import Error
+    if not options.get('bulk_session'):
+        yield
+        return
+    previous, failures = apply_bulk_session(cnx)
+    if previous:
+        print(f"\033[93mSession allégée : {', '.join(previous)}\033[0m")
+    for variable, error in failures:
+        print(f"\033[93mRéglage de session non appliqué : {variable} ({error})\033[0m")
+    try:
+        yield
+    except BaseException:
+        try:
+            restore_session(cnx, previous, commit=False)
+        except Error as err:
+            print(f"\033[93mSession non rétablie après l'erreur : {err}\033[0m")
+        raise
+    restore_session(cnx, previous)
+
+def profile_connection(cnx, options):
+    """Connexion chronométrée par le profileur du run (--profile), ou la connexion telle quelle."""
+    profiler = options.get('profiler')
+    return profiler.wrap_connection(cnx) if profiler else cnx